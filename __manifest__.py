@@ -24,7 +24,7 @@ Works standalone in local admin mode or with SmartHive server addon on Odoo 18 E
     'author': 'SmartHive',
     'website': 'https://www.smarthive.com',
     'license': 'LGPL-3',
-    'depends': ['base', 'web', 'mail', 'crm'],
+    'depends': ['base', 'web', 'bus', 'mail', 'crm'],
     'data': [
         'security/security.xml',
         'security/ir.model.access.csv',
@@ -42,6 +42,7 @@ Works standalone in local admin mode or with SmartHive server addon on Odoo 18 E
         'web.assets_backend': [
             'smarthive_client/static/src/js/smarthive_immediate.js',
             'smarthive_client/static/src/js/smarthive_warning_global.js',
+            'smarthive_client/static/src/js/smarthive_tab_coordinator.js',
             'smarthive_client/static/src/js/warning_banner.js',
             'smarthive_client/static/src/js/crm_warning_service.js',
             'smarthive_client/static/src/css/warning_banner.css',
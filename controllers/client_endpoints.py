@@ -2,8 +2,13 @@
 
 import json
 import logging
+import zlib
+from datetime import datetime, timezone
 from odoo import http, fields
-from odoo.http import request
+from odoo.http import request, Response
+
+from ..tools import metrics
+from ..tools.profiling import profiled
 
 _logger = logging.getLogger(__name__)
 
@@ -11,27 +16,88 @@ _logger = logging.getLogger(__name__)
 CLIENT_CONFIG_MODEL = 'smarthive.client.config'
 CLIENT_STATUS_MODEL = 'smarthive.client.status'
 
+# Rows fetched per round trip by the status log export
+EXPORT_BATCH_SIZE = 2000
+
+
+def authenticate_server_request():
+    """Authenticate API request from SmartHive server
+
+    Credentials are checked through the cached, hashed lookup of the config
+    model, so bursts of server calls do not hit the database.
+    """
+    api_key = request.httprequest.headers.get('X-SmartHive-API-Key')
+    client_id = request.httprequest.headers.get('X-SmartHive-Client-ID')
+    
+    if not api_key or not client_id:
+        return False, "Missing API key or client ID"
+    
+    config = request.env[CLIENT_CONFIG_MODEL]._authenticate_api_key(client_id, api_key)
+    
+    if not config:
+        return False, "Invalid API credentials"
+        
+    return config, None
+
+
+def _parse_since_date(value):
+    """Parse an export cursor date, as emitted by the export, at full precision"""
+    since_date = datetime.fromisoformat(value)
+    if since_date.tzinfo:
+        since_date = since_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return since_date
+
+
+def _stream_status_log(registry, since_date, since_id, limit, compress):
+    """Yield status log rows as NDJSON chunks, read through a server-side cursor
+
+    The generator runs after the request cursor is closed, so it reads on a
+    cursor of its own and keeps memory bounded to one batch.
+    """
+    query = """
+        SELECT id, create_date, status_type, status, message, details
+          FROM smarthive_client_status
+         WHERE create_date IS NOT NULL
+    """
+    params = []
+    if since_date:
+        query += " AND (create_date, id) > (%s, %s)"
+        params += [since_date, since_id or 0]
+    query += " ORDER BY create_date, id"
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    with registry.cursor() as cr:
+        server_cursor = cr._cnx.cursor(name='smarthive_status_export')
+        try:
+            server_cursor.itersize = EXPORT_BATCH_SIZE
+            server_cursor.execute(query, params)
+            while True:
+                rows = server_cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                chunk = ''.join(json.dumps({
+                    'id': row[0],
+                    'create_date': row[1].isoformat(),
+                    'status_type': row[2],
+                    'status': row[3],
+                    'message': row[4],
+                    'details': row[5],
+                }) + '\n' for row in rows).encode()
+                yield compressor.compress(chunk) if compressor else chunk
+        finally:
+            server_cursor.close()
+    if compressor:
+        yield compressor.flush()
+
 
 class SmartHiveClientController(http.Controller):
     
     def _authenticate_request(self):
         """Authenticate API request from SmartHive server"""
-        api_key = request.httprequest.headers.get('X-SmartHive-API-Key')
-        client_id = request.httprequest.headers.get('X-SmartHive-Client-ID')
-        
-        if not api_key or not client_id:
-            return False, "Missing API key or client ID"
-        
-        config = request.env[CLIENT_CONFIG_MODEL].sudo().search([
-            ('client_id', '=', client_id),
-            ('api_key', '=', api_key),
-            ('active', '=', True)
-        ], limit=1)
-        
-        if not config:
-            return False, "Invalid API credentials"
-            
-        return config, None
+        return authenticate_server_request()
 
 
 class SmartHiveServerController(http.Controller):
@@ -39,24 +105,10 @@ class SmartHiveServerController(http.Controller):
     
     def _authenticate_request(self):
         """Authenticate API request from SmartHive server"""
-        api_key = request.httprequest.headers.get('X-SmartHive-API-Key')
-        client_id = request.httprequest.headers.get('X-SmartHive-Client-ID')
-        
-        if not api_key or not client_id:
-            return False, "Missing API key or client ID"
-        
-        config = request.env[CLIENT_CONFIG_MODEL].sudo().search([
-            ('client_id', '=', client_id),
-            ('api_key', '=', api_key),
-            ('active', '=', True)
-        ], limit=1)
-        
-        if not config:
-            return False, "Invalid API credentials"
-            
-        return config, None
+        return authenticate_server_request()
 
     @http.route('/smarthive_client/ping', type='json', auth='none', methods=['GET'], csrf=False)
+    @profiled('/smarthive_client/ping')
     def ping(self):
         """Health check endpoint"""
         try:
@@ -64,10 +116,11 @@ class SmartHiveServerController(http.Controller):
             if error:
                 return {'success': False, 'error': error}
             
+            metadata = request.env[CLIENT_CONFIG_MODEL]._get_static_metadata()
             return {
                 'success': True,
-                'odoo_version': request.env['ir.module.module'].get_module_info('base').get('version', 'Unknown'),
-                'addon_version': '17.0.1.0.0',
+                'odoo_version': metadata['odoo_version'],
+                'addon_version': metadata['addon_version'],
                 'timestamp': fields.Datetime.now().isoformat(),
             }
             
@@ -76,6 +129,7 @@ class SmartHiveServerController(http.Controller):
             return {'success': False, 'error': str(e)}
 
     @http.route('/smarthive_client/block', type='json', auth='none', methods=['POST'], csrf=False)
+    @profiled('/smarthive_client/block')
     def block_client(self):
         """Block client access"""
         try:
@@ -91,11 +145,8 @@ class SmartHiveServerController(http.Controller):
             })
             
             # Log the block action
-            request.env[CLIENT_STATUS_MODEL].sudo().create({
-                'status_type': 'block',
-                'status': 'warning',
-                'message': f"Client access blocked: {data.get('block_reason', 'No reason provided')}",
-            })
+            request.env[CLIENT_STATUS_MODEL].sudo().log_status('block', 'warning',
+                f"Client access blocked: {data.get('block_reason', 'No reason provided')}")
             
             return {'success': True}
             
@@ -104,6 +155,7 @@ class SmartHiveServerController(http.Controller):
             return {'success': False, 'error': str(e)}
 
     @http.route('/smarthive_client/unblock', type='json', auth='none', methods=['POST'], csrf=False)
+    @profiled('/smarthive_client/unblock')
     def unblock_client(self):
         """Unblock client access"""
         try:
@@ -117,11 +169,7 @@ class SmartHiveServerController(http.Controller):
             })
             
             # Log the unblock action
-            request.env[CLIENT_STATUS_MODEL].sudo().create({
-                'status_type': 'block',
-                'status': 'success',
-                'message': "Client access unblocked",
-            })
+            request.env[CLIENT_STATUS_MODEL].sudo().log_status('block', 'success', "Client access unblocked")
             
             return {'success': True}
             
@@ -130,6 +178,7 @@ class SmartHiveServerController(http.Controller):
             return {'success': False, 'error': str(e)}
 
     @http.route('/smarthive_client/warning', type='json', auth='none', methods=['POST'], csrf=False)
+    @profiled('/smarthive_client/warning')
     def set_warning(self):
         """Set warning banner configuration"""
         try:
@@ -147,12 +196,12 @@ class SmartHiveServerController(http.Controller):
             })
             
             # Log the warning action
-            request.env[CLIENT_STATUS_MODEL].sudo().create({
-                'status_type': 'warning',
-                'status': 'info',
-                'message': f"Warning banner {'enabled' if data.get('show_warning') else 'disabled'}",
-                'details': json.dumps(data),
-            })
+            request.env[CLIENT_STATUS_MODEL].sudo().log_status(
+                'warning', 'info',
+                f"Warning banner {'enabled' if data.get('show_warning') else 'disabled'}",
+                details=json.dumps(data),
+                durable=True,
+            )
             
             return {'success': True}
             
@@ -160,7 +209,76 @@ class SmartHiveServerController(http.Controller):
             _logger.error(f"Set warning error: {str(e)}")
             return {'success': False, 'error': str(e)}
 
+    @http.route('/smarthive_client/commands', type='json', auth='none', methods=['POST'], csrf=False)
+    @profiled('/smarthive_client/commands')
+    def apply_commands(self):
+        """Apply an ordered batch of block, unblock and warning commands
+
+        Each command is a dict with a ``type``, its parameters and an optional
+        idempotency ``key``; already applied keys are skipped.
+        """
+        try:
+            config, error = self._authenticate_request()
+            if error:
+                return {'success': False, 'error': error}
+            
+            commands = (request.jsonrequest or {}).get('commands')
+            if not isinstance(commands, list):
+                return {'success': False, 'error': 'Missing command list'}
+            
+            results = config.sudo()._apply_commands(commands)
+            return {'success': True, 'results': results}
+            
+        except Exception as e:
+            _logger.error(f"Apply commands error: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @http.route('/smarthive_client/status_log/export', type='http', auth='none', methods=['GET'], csrf=False)
+    @profiled('/smarthive_client/status_log/export')
+    def export_status_log(self, since_date=None, since_id=None, limit=None, compress=None, **kwargs):
+        """Stream status log entries as NDJSON with keyset pagination
+
+        Rows are ordered by (create_date, id) and start after the
+        ``since_date``/``since_id`` pair of the last row previously received.
+        """
+        try:
+            _, error = self._authenticate_request()
+            if error:
+                return request.make_json_response({'success': False, 'error': error}, status=401)
+            
+            since_date = _parse_since_date(since_date) if since_date else None
+            since_id = int(since_id) if since_id else None
+            limit = int(limit) if limit else None
+            compress = compress == 'gzip'
+            
+            headers = [('Content-Type', 'application/x-ndjson')]
+            if compress:
+                headers.append(('Content-Encoding', 'gzip'))
+            stream = _stream_status_log(request.env.registry, since_date, since_id, limit, compress)
+            return Response(stream, headers=headers, direct_passthrough=True)
+            
+        except Exception as e:
+            _logger.error(f"Export status log error: {str(e)}")
+            return request.make_json_response({'success': False, 'error': str(e)}, status=400)
+
+    @http.route('/smarthive_client/metrics', type='http', auth='none', methods=['GET'], csrf=False)
+    @profiled('/smarthive_client/metrics')
+    def export_metrics(self, **kwargs):
+        """Expose the metrics of every worker in the Prometheus text format"""
+        try:
+            _, error = self._authenticate_request()
+            if error:
+                return request.make_json_response({'success': False, 'error': error}, status=401)
+            
+            body = metrics.render_prometheus(metrics.collect(request.env.cr.dbname))
+            return Response(body, headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')])
+            
+        except Exception as e:
+            _logger.error(f"Export metrics error: {str(e)}")
+            return request.make_json_response({'success': False, 'error': str(e)}, status=400)
+
     @http.route('/smarthive_client/status', type='json', auth='none', methods=['GET'], csrf=False)
+    @profiled('/smarthive_client/status')
     def get_status(self):
         """Get current client status"""
         try:
@@ -188,19 +306,24 @@ class SmartHiveServerController(http.Controller):
 class SmartHiveWarningController(http.Controller):
     
     @http.route('/smarthive_client/warning_data', type='json', auth='user', methods=['GET', 'POST'], csrf=False)
-    def get_warning_data(self):
-        """Get warning banner data for current user"""
+    @profiled('/smarthive_client/warning_data')
+    def get_warning_data(self, version=None, **kwargs):
+        """Get warning banner data for current user
+
+        Clients send back the last seen ``version`` (or an If-None-Match
+        header) and get a small "not modified" answer while it is current.
+        """
         try:
-            # Use sudo() to bypass security restrictions for reading warning data
+            # Served from the cached enforcement state, which is read with sudo()
             # This is safe because we're only reading warning information, not sensitive config
-            config = request.env[CLIENT_CONFIG_MODEL].sudo().search([
-                ('active', '=', True)
-            ], limit=1)
+            config_model = request.env[CLIENT_CONFIG_MODEL]
+            token = config_model._get_state_token()
             
-            if not config:
-                return {'show_warning': False}
+            client_token = version or request.httprequest.headers.get('If-None-Match')
+            if client_token and str(client_token).strip('"') == token:
+                return {'not_modified': True, 'version': token}
             
-            return config.get_warning_data() or {'show_warning': False}
+            return config_model._get_warning_payload()
             
         except Exception as e:
             _logger.error(f"Get warning data error: {str(e)}")
@@ -217,6 +340,7 @@ class SmartHiveLocalAdminController(http.Controller):
         return True, None
     
     @http.route('/smarthive_client/local/block', type='json', auth='user', methods=['POST'], csrf=False)
+    @profiled('/smarthive_client/local/block')
     def local_block_client(self):
         """Block client access locally (admin only)"""
         try:
@@ -239,11 +363,7 @@ class SmartHiveLocalAdminController(http.Controller):
             })
             
             # Log the block action
-            request.env[CLIENT_STATUS_MODEL].sudo().create({
-                'status_type': 'block',
-                'status': 'warning',
-                'message': 'Local admin blocked client access',
-            })
+            request.env[CLIENT_STATUS_MODEL].sudo().log_status('block', 'warning', 'Local admin blocked client access')
             
             return {'success': True}
             
@@ -252,6 +372,7 @@ class SmartHiveLocalAdminController(http.Controller):
             return {'success': False, 'error': str(e)}
     
     @http.route('/smarthive_client/local/unblock', type='json', auth='user', methods=['POST'], csrf=False)
+    @profiled('/smarthive_client/local/unblock')
     def local_unblock_client(self):
         """Unblock client access locally (admin only)"""
         try:
@@ -272,11 +393,7 @@ class SmartHiveLocalAdminController(http.Controller):
             })
             
             # Log the unblock action
-            request.env[CLIENT_STATUS_MODEL].sudo().create({
-                'status_type': 'block',
-                'status': 'success',
-                'message': 'Local admin unblocked client access',
-            })
+            request.env[CLIENT_STATUS_MODEL].sudo().log_status('block', 'success', 'Local admin unblocked client access')
             
             return {'success': True}
             
@@ -285,6 +402,7 @@ class SmartHiveLocalAdminController(http.Controller):
             return {'success': False, 'error': str(e)}
     
     @http.route('/smarthive_client/local/warning', type='json', auth='user', methods=['POST'], csrf=False)
+    @profiled('/smarthive_client/local/warning')
     def local_set_warning(self):
         """Set warning banner locally (admin only)"""
         try:
@@ -309,11 +427,8 @@ class SmartHiveLocalAdminController(http.Controller):
             })
             
             # Log the warning action
-            request.env[CLIENT_STATUS_MODEL].sudo().create({
-                'status_type': 'warning',
-                'status': 'info',
-                'message': 'Local admin updated warning configuration',
-            })
+            request.env[CLIENT_STATUS_MODEL].sudo().log_status('warning', 'info',
+                'Local admin updated warning configuration', durable=True)
             
             return {'success': True}
             
@@ -6,4 +6,7 @@ from . import smarthive_warning_wizard
 from . import smarthive_crm_wizards
 from . import crm_lead
 from . import res_config_settings
-from . import res_users
\ No newline at end of file
+from . import res_users
+from . import res_company
+from . import ir_http
+from . import ir_websocket
\ No newline at end of file
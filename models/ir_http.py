@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from werkzeug.exceptions import Forbidden
+
+from odoo import _, api, models, tools
+from odoo.exceptions import AccessError
+from odoo.http import request
+
+from ..tools import metrics
+
+# ORM RPC routes whose model and method are read from the JSON-RPC params
+ORM_RPC_ROUTES = ('/web/dataset/call_kw', '/web/dataset/call_button')
+
+# Model methods still callable while blocked, every other call_kw and call_button is rejected
+READ_ONLY_METHODS = {
+    'read',
+    'search',
+    'search_read',
+    'search_count',
+    'name_search',
+    'read_group',
+    'fields_get',
+    'default_get',
+    'onchange',
+    'get_views',
+    'web_read',
+    'web_search_read',
+    'web_read_group',
+    'read_progress_bar',
+    'search_panel_select_range',
+    'search_panel_select_multi_range',
+    'check_access_rights',
+    'get_formview_id',
+}
+
+# Routes whose requests are counted and timed in the metrics
+METRICS_ROUTE_PREFIX = '/smarthive_client/'
+
+# Defaults of the configurable allowlists
+DEFAULT_ALLOWED_MODELS = 'smarthive.block.wizard,smarthive.crm.warning.wizard,res.users.settings'
+DEFAULT_ALLOWED_ROUTES = (
+    '/web/login,/web/session/,/web/export/,/report/,/smarthive_client/,/websocket,/bus/,'
+    '/web/action/load,/web/webclient/,/mail/init_messaging,/mail/thread/data,/mail/thread/messages'
+)
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @api.model
+    @tools.ormcache()
+    def _smarthive_block_allowlists(self):
+        """Get the models and route prefixes still writable while blocked"""
+        params = self.env['ir.config_parameter'].sudo()
+        allowed_models = params.get_param('smarthive_client.block_allowed_models', DEFAULT_ALLOWED_MODELS)
+        allowed_routes = params.get_param('smarthive_client.block_allowed_routes', DEFAULT_ALLOWED_ROUTES)
+        return (
+            frozenset(name.strip() for name in allowed_models.split(',') if name.strip()),
+            tuple(route.strip() for route in allowed_routes.split(',') if route.strip()),
+        )
+
+    def session_info(self):
+        """Ship the current warning/block state with the web client session"""
+        result = super().session_info()
+        if self.env.uid:
+            result['smarthive_warning'] = self.env['smarthive.client.config']._get_warning_payload()
+        return result
+
+    @classmethod
+    def _pre_dispatch(cls, rule, args):
+        if rule.rule.startswith(METRICS_ROUTE_PREFIX):
+            request.smarthive_route = (rule.rule, time.monotonic())
+        super()._pre_dispatch(rule, args)
+        if request.session.uid:
+            cls._smarthive_check_request()
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        # Buffered status entries of idle HTTP workers must not wait for the next log call
+        request.env['smarthive.client.status'].flush_log_buffer_if_due()
+        dbname = request.env.cr.dbname
+        route = getattr(request, 'smarthive_route', None)
+        if route:
+            metrics.inc(dbname, 'smarthive_route_requests_total',
+                        {'route': route[0], 'status': getattr(response, 'status_code', 200)})
+            metrics.observe(dbname, 'smarthive_route_duration_seconds', time.monotonic() - route[1],
+                            {'route': route[0]})
+        # Enforcement and cache counters are collected on every route, throttled per worker
+        metrics.flush(dbname)
+
+    @classmethod
+    def _smarthive_check_request(cls):
+        """Reject mutating requests of non-exempt users while the client is blocked
+
+        The decision only uses cached state, so requests cost no query while
+        nothing is blocked.
+        """
+        env = request.env
+        block_reason = env['res.users']._smarthive_block_reason(check='dispatch')
+        if not block_reason:
+            return
+        
+        path = request.httprequest.path
+        allowed_models, allowed_routes = env['ir.http']._smarthive_block_allowlists()
+        if path.startswith(allowed_routes):
+            return
+        
+        if path.startswith(ORM_RPC_ROUTES):
+            params = (request.get_json_data() or {}).get('params') or {}
+            if params.get('model') in allowed_models:
+                return
+            if path.startswith('/web/dataset/call_kw') and params.get('method') in READ_ONLY_METHODS:
+                return
+            raise AccessError(_("System access is currently restricted: %s", block_reason))
+        
+        # Any other JSON route may change data, only allowlisted route prefixes pass
+        if request.dispatcher.routing_type == 'json':
+            raise AccessError(_("System access is currently restricted: %s", block_reason))
+        
+        if request.httprequest.method == 'POST' and request.dispatcher.routing_type == 'http':
+            raise Forbidden(_("System access is currently restricted: %s", block_reason))
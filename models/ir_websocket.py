@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+from odoo.http import request
+from odoo.addons.bus.websocket import wsrequest
+
+from .smarthive_client_config import STATE_BUS_CHANNEL
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """Subscribe logged-in users to SmartHive warning/block state changes"""
+        req = request or wsrequest
+        if req.session.uid:
+            channels = list(channels)
+            channels.append(STATE_BUS_CHANNEL)
+        return super()._build_bus_channel_list(channels)
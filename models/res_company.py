@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, models
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to refresh the cached SmartHive company count"""
+        companies = super().create(vals_list)
+        self.env['smarthive.client.config']._invalidate_instance_counts()
+        return companies
+
+    def unlink(self):
+        """Override unlink to refresh the cached SmartHive company count"""
+        result = super().unlink()
+        self.env['smarthive.client.config']._invalidate_instance_counts()
+        return result
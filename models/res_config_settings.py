@@ -36,4 +36,70 @@ class ResConfigSettings(models.TransientModel):
         default=True,
         config_parameter='smarthive_client.auto_report',
         help='Automatically report status to server'
+    )
+    
+    smarthive_client_heartbeat_concurrency = fields.Integer(
+        string='Heartbeat Concurrency',
+        default=1,
+        config_parameter='smarthive_client.heartbeat_concurrency',
+        help='Number of configurations sending their heartbeat in parallel during a cron run'
+    )
+    
+    smarthive_client_heartbeat_deadline = fields.Integer(
+        string='Heartbeat Cron Deadline (seconds)',
+        default=600,
+        config_parameter='smarthive_client.heartbeat_deadline',
+        help='Maximum time a heartbeat cron run waits for parallel heartbeats'
+    )
+    
+    smarthive_client_status_retention_days = fields.Integer(
+        string='Status Log Retention (days)',
+        default=90,
+        config_parameter='smarthive_client.status_retention_days',
+        help='Status log entries older than this are purged daily (0 keeps them forever)'
+    )
+    
+    smarthive_client_status_retention_max_rows = fields.Integer(
+        string='Status Log Max Entries',
+        default=100000,
+        config_parameter='smarthive_client.status_retention_max_rows',
+        help='Only the most recent entries up to this count are kept (0 for no limit)'
+    )
+    
+    smarthive_client_status_partitioning = fields.Boolean(
+        string='Partition Status Log by Month',
+        config_parameter='smarthive_client.status_partitioning',
+        help='Store the status log in monthly PostgreSQL partitions so expired months are dropped at once'
+    )
+    
+    smarthive_client_block_allowed_models = fields.Char(
+        string='Models Writable While Blocked',
+        config_parameter='smarthive_client.block_allowed_models',
+        help='Comma-separated models non-admin users may still modify while access is blocked'
+    )
+    
+    smarthive_client_block_allowed_routes = fields.Char(
+        string='Routes Allowed While Blocked',
+        config_parameter='smarthive_client.block_allowed_routes',
+        help='Comma-separated route prefixes exempt from the block check'
+    )
+    
+    smarthive_client_profiling = fields.Boolean(
+        string='Profile SmartHive Hooks',
+        config_parameter='smarthive_client.profiling',
+        help='Measure wall time and SQL queries of SmartHive routes, heartbeats and CRM overrides'
+    )
+    
+    smarthive_client_profiling_threshold_ms = fields.Integer(
+        string='Slow Call Threshold (ms)',
+        default=500,
+        config_parameter='smarthive_client.profiling_threshold_ms',
+        help='Profiled calls slower than this are logged as system errors in the status log'
+    )
+    
+    smarthive_client_profiling_sample_rate = fields.Float(
+        string='Profiler Sample Rate (%)',
+        default=0.0,
+        config_parameter='smarthive_client.profiling_sample_rate',
+        help='Share of profiled calls run under the Odoo profiler, saved under Settings > Technical > Profiling'
     )
\ No newline at end of file
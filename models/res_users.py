@@ -1,54 +1,103 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, models, _
+import logging
+
+from odoo import api, models, tools, SUPERUSER_ID, _
 from odoo.exceptions import AccessDenied
 
+from ..tools import metrics
+
+_logger = logging.getLogger(__name__)
+
 # Constants
 CLIENT_CONFIG_MODEL = 'smarthive.client.config'
 
+# Groups whose members keep access while the client is blocked
+SMARTHIVE_EXEMPT_GROUPS = (
+    'base.group_system',  # System admin
+    'smarthive_client.group_smarthive_client_admin',  # SmartHive admin
+    'base.group_erp_manager',  # ERP Manager as fallback
+)
+
 
 class ResUsers(models.Model):
     _inherit = 'res.users'
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to refresh the cached SmartHive user count"""
+        users = super().create(vals_list)
+        self.env[CLIENT_CONFIG_MODEL]._invalidate_instance_counts()
+        return users
+
+    def write(self, vals):
+        """Override write to refresh cached SmartHive exemptions on group changes"""
+        result = super().write(vals)
+        if 'groups_id' in vals:
+            self.env.registry.clear_cache()
+        if 'active' in vals:
+            self.env[CLIENT_CONFIG_MODEL]._invalidate_instance_counts()
+        return result
+
+    def unlink(self):
+        """Override unlink to refresh the cached SmartHive user count"""
+        result = super().unlink()
+        self.env[CLIENT_CONFIG_MODEL]._invalidate_instance_counts()
+        return result
+
+    @api.model
+    @tools.ormcache('uid')
+    def _smarthive_is_exempt(self, uid):
+        """Check whether a user keeps access while the client is blocked
+
+        Cached per uid; group changes clear the registry cache.
+        """
+        if uid == SUPERUSER_ID:
+            return True
+        user = self.sudo().browse(uid)
+        return any(user.has_group(group) for group in SMARTHIVE_EXEMPT_GROUPS)
+
+    @api.model
+    def _smarthive_block_reason(self, uid=None, check='other'):
+        """Get the block reason applying to a user, or None when access is allowed
+
+        Only cached state is consulted, so this costs no query unless a cache
+        was just cleared. ``check`` names the caller in the enforcement metrics.
+        """
+        state = self.env[CLIENT_CONFIG_MODEL]._get_enforcement_state()
+        if not state or not state.is_blocked:
+            result = 'allowed'
+            block_reason = None
+        elif self._smarthive_is_exempt(uid or self.env.uid):
+            result = 'exempt'
+            block_reason = None
+        else:
+            result = 'blocked'
+            block_reason = state.block_reason or "System access is currently restricted. Contact your administrator."
+        metrics.inc(self.env.cr.dbname, 'smarthive_enforcement_checks_total', {'check': check, 'result': result})
+        return block_reason
+
     @classmethod
     def authenticate(cls, db, login, password, user_agent_env):
         """Override authenticate to check SmartHive access restrictions"""
         # First perform normal authentication
         uid = super(ResUsers, cls).authenticate(db, login, password, user_agent_env)
         
-        # Temporarily disable SmartHive blocking during setup
-        # TODO: Re-enable this after proper group configuration
-        return uid
+        if uid:
+            # Check SmartHive restrictions after successful authentication
+            try:
+                with cls.pool.cursor() as cr:
+                    env = api.Environment(cr, uid, {})
+                    block_reason = env['res.users']._smarthive_block_reason(uid, check='login')
+            except Exception as e:
+                # If there's any error checking SmartHive config, allow access to prevent lockout
+                _logger.error(f"SmartHive login check failed: {str(e)}")
+                block_reason = None
+            
+            if block_reason:
+                raise AccessDenied(_("Access Denied: %s") % block_reason)
         
-        # if uid:
-        #     # Check SmartHive restrictions after successful authentication
-        #     with cls.pool.cursor() as cr:
-        #         env = api.Environment(cr, uid, {})
-        #         
-        #         try:
-        #             config = env[CLIENT_CONFIG_MODEL].get_active_config()
-        #             
-        #             if config and config.is_blocked:
-        #                 user = env['res.users'].browse(uid)
-        #                 
-        #                 # Allow access for superuser, system admins, and SmartHive Client Admins
-        #                 is_allowed = (
-        #                     uid == 1 or  # Superuser
-        #                     user.has_group('base.group_system') or  # System admin
-        #                     user.has_group('smarthive_client.group_smarthive_client_admin') or  # SmartHive admin
-        #                     user.has_group('base.group_erp_manager')  # ERP Manager as fallback
-        #                 )
-        #                 
-        #                 if not is_allowed:
-        #                     block_reason = config.block_reason or "System access is currently restricted. Contact your administrator."
-        #                     raise AccessDenied(_("Access Denied: %s") % block_reason)
-        #                     
-        #         except Exception:
-        #             # If there's any error checking SmartHive config, allow access to prevent lockout
-        #             # This prevents the system from being completely inaccessible
-        #             pass
-        # 
-        # return uid
+        return uid
 
     @api.model
     def check_access_rights(self, operation, raise_exception=True):
@@ -56,31 +105,19 @@ class ResUsers(models.Model):
         # First check normal access rights
         result = super(ResUsers, self).check_access_rights(operation, raise_exception=raise_exception)
         
-        # Temporarily disable SmartHive access restrictions during setup
-        return result
+        if not result or self.env.su:
+            return result
+        
+        try:
+            block_reason = self._smarthive_block_reason(check='access_rights')
+        except Exception as e:
+            # If there's any error, allow access to prevent system lockout
+            _logger.error(f"SmartHive access check failed: {str(e)}")
+            return result
         
-        # try:
-        #     # Skip check for superuser, system admins, and SmartHive Client Admins
-        #     is_allowed = (
-        #         self.env.uid == 1 or  # Superuser
-        #         self.env.user.has_group('base.group_system') or  # System admin
-        #         self.env.user.has_group('smarthive_client.group_smarthive_client_admin') or  # SmartHive admin
-        #         self.env.user.has_group('base.group_erp_manager')  # ERP Manager as fallback
-        #     )
-        #     
-        #     if is_allowed:
-        #         return result
-        #         
-        #     # Check SmartHive restrictions for other users
-        #     config = self.env[CLIENT_CONFIG_MODEL].get_active_config()
-        #     if config and config.is_blocked:
-        #         if raise_exception:
-        #             raise AccessDenied(_("System access is currently restricted: %s") % 
-        #                              (config.block_reason or "Contact administrator"))
-        #         return False
-        #         
-        # except Exception:
-        #     # If there's any error, allow access to prevent system lockout
-        #     pass
-        # 
-        # return result
\ No newline at end of file
+        if block_reason:
+            if raise_exception:
+                raise AccessDenied(_("System access is currently restricted: %s") % block_reason)
+            return False
+        
+        return result
@@ -1,14 +1,102 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import hmac
 import json
 import logging
+import random
 import requests
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import AccessDenied, UserError, ValidationError
+from odoo.modules.module import get_manifest
+
+from ..tools import circuit_breaker, command_channel, heartbeat_aggregator, http_pool, metrics
+from ..tools.profiling import profiled
 
 _logger = logging.getLogger(__name__)
 
+# Immutable snapshot of the enforcement state, cached per worker
+EnforcementState = namedtuple('EnforcementState', [
+    'config_id',
+    'is_blocked',
+    'block_reason',
+    'show_warning',
+    'message',
+    'payment_status',
+    'outstanding_amount',
+    'local_admin_mode',
+    'state_version',
+])
+
+# Bus channel and notification type carrying warning/block state changes
+STATE_BUS_CHANNEL = 'smarthive_client_state'
+STATE_BUS_TYPE = 'smarthive_client/state'
+
+# Capability advertised by servers answering heartbeats with deltas
+HEARTBEAT_DELTA_CAPABILITY = 'heartbeat_delta_v1'
+
+# Server response keys making up the acknowledged heartbeat state
+HEARTBEAT_STATE_KEYS = ('blocked', 'block_reason', 'show_warning', 'warning_message', 'payment_status')
+
+# Seconds a verified API credential lookup stays in the worker cache
+AUTH_CACHE_TTL = 300
+
+# Credential lookups kept per worker, across databases
+AUTH_CACHE_SIZE = 256
+
+# Fields whose change invalidates cached API credential lookups
+AUTH_FIELDS = {'active', 'client_id', 'api_key'}
+
+# Per-worker LRU of credential lookups:
+# (dbname, client_id) -> (config_id, key_hash, expires_at, registry cache sequence)
+_api_credentials = OrderedDict()
+_api_credentials_lock = threading.Lock()
+
+# Idempotency keys of applied server commands remembered per configuration
+COMMAND_KEYS_LIMIT = 1000
+
+# Seconds user and company counts stay cached between refreshes
+COUNTERS_CACHE_TTL = 600
+
+# Static heartbeat metadata collected at registry load, keyed by database name
+_static_metadata = {}
+
+# User and company counts of this worker: dbname -> ((users, companies), expires_at)
+_instance_counts = {}
+
+# Share of the heartbeat interval randomly added or removed to spread server load
+HEARTBEAT_JITTER = 0.1
+
+# Retry delay bounds (seconds) after failed heartbeats, doubling with each failure
+HEARTBEAT_BACKOFF_BASE = 60
+HEARTBEAT_BACKOFF_MAX = 3600
+
+# Seconds running heartbeats may take to finish once the cron deadline passed
+HEARTBEAT_SHUTDOWN_GRACE = 30
+
+# First key of the advisory locks held while a configuration's heartbeat runs
+HEARTBEAT_LOCK_NAMESPACE = 0x5348
+
+# Fields whose change sends a heartbeat right away
+HEARTBEAT_TRIGGER_FIELDS = {'active', 'server_url', 'client_id', 'api_key', 'heartbeat_interval', 'local_admin_mode'}
+
+# Fields whose change invalidates the cached enforcement state
+ENFORCEMENT_FIELDS = {
+    'active',
+    'is_blocked',
+    'block_reason',
+    'show_warning',
+    'warning_message',
+    'payment_status',
+    'outstanding_amount',
+    'local_admin_mode',
+}
+
 
 class SmartHiveClientConfig(models.Model):
     _name = 'smarthive.client.config'
@@ -29,6 +117,7 @@ class SmartHiveClientConfig(models.Model):
     client_id = fields.Char(
         string='Client ID',
         required=True,
+        index=True,
         help='Unique client identifier configured on the server'
     )
     
@@ -38,6 +127,15 @@ class SmartHiveClientConfig(models.Model):
         help='API key for authentication with server'
     )
     
+    api_key_hash = fields.Char(
+        string='API Key Hash',
+        compute='_compute_api_key_hash',
+        store=True,
+        index=True,
+        copy=False,
+        help='SHA-256 of the API key, used to authenticate server requests'
+    )
+    
     active = fields.Boolean(
         string='Active',
         default=True
@@ -78,6 +176,14 @@ class SmartHiveClientConfig(models.Model):
         help='Outstanding payment amount from server'
     )
     
+    state_version = fields.Integer(
+        string='State Version',
+        default=0,
+        readonly=True,
+        copy=False,
+        help='Incremented on every change of the warning or block state'
+    )
+    
     last_server_contact = fields.Datetime(
         string='Last Server Contact',
         help='Last successful communication with server'
@@ -89,6 +195,74 @@ class SmartHiveClientConfig(models.Model):
         help='How often to send heartbeat to server'
     )
     
+    next_heartbeat_at = fields.Datetime(
+        string='Next Heartbeat',
+        readonly=True,
+        copy=False,
+        index=True,
+        help='When the heartbeat cron sends the next heartbeat; empty means right away'
+    )
+    
+    heartbeat_failures = fields.Integer(
+        string='Consecutive Heartbeat Failures',
+        readonly=True,
+        copy=False,
+        help='Failed heartbeats since the last success, used to back off retries'
+    )
+    
+    delta_heartbeat = fields.Boolean(
+        string='Delta Heartbeats',
+        readonly=True,
+        copy=False,
+        help='Set when the server supports delta heartbeats with "unchanged" acknowledgements'
+    )
+    
+    last_state_fingerprint = fields.Char(
+        string='Last State Fingerprint',
+        readonly=True,
+        copy=False,
+        help='Fingerprint of the state last acknowledged by the server'
+    )
+    
+    last_reported_metrics = fields.Text(
+        string='Last Reported Metrics',
+        readonly=True,
+        copy=False,
+        help='Metrics last acknowledged by the server, as JSON'
+    )
+    
+    command_channel = fields.Boolean(
+        string='Command Channel',
+        default=False,
+        help='Keep a long-poll request open to the server so commands apply within seconds, '
+             'even when the server cannot reach this instance'
+    )
+    
+    processed_command_keys = fields.Text(
+        string='Processed Command Keys',
+        readonly=True,
+        copy=False,
+        help='Idempotency keys of the most recent server commands, as a JSON list'
+    )
+    
+    connect_timeout = fields.Integer(
+        string='Connect Timeout (seconds)',
+        default=5,
+        help='Maximum time to establish a connection to the server'
+    )
+    
+    read_timeout = fields.Integer(
+        string='Read Timeout (seconds)',
+        default=30,
+        help='Maximum time to wait for the server response'
+    )
+    
+    max_retries = fields.Integer(
+        string='Max Retries',
+        default=2,
+        help='Retries with jittered exponential backoff for idempotent calls'
+    )
+    
     auto_report_status = fields.Boolean(
         string='Auto Report Status',
         default=True,
@@ -123,6 +297,16 @@ class SmartHiveClientConfig(models.Model):
                 self.env.user.id == 1
             )
 
+    @api.depends('api_key')
+    def _compute_api_key_hash(self):
+        """Compute the hash used to verify API keys of inbound requests"""
+        for record in self:
+            record.api_key_hash = self._hash_api_key(record.api_key) if record.api_key else False
+
+    @staticmethod
+    def _hash_api_key(api_key):
+        return hashlib.sha256(api_key.encode()).hexdigest()
+
     @api.constrains('server_url')
     def _check_server_url_format(self):
         """Validate server URL format"""
@@ -139,46 +323,102 @@ class SmartHiveClientConfig(models.Model):
             'X-SmartHive-Client-ID': self.client_id,
         }
 
-    def _make_server_request(self, endpoint, method='POST', data=None):
-        """Make API request to SmartHive server"""
+    def _record_server_request(self, endpoint, error_type=None):
+        """Count a server request and, when it failed, its error type"""
+        dbname = self.env.cr.dbname
+        metrics.inc(dbname, 'smarthive_server_requests_total',
+                    {'endpoint': endpoint, 'outcome': 'error' if error_type else 'success'})
+        if error_type:
+            metrics.inc(dbname, 'smarthive_server_errors_total', {'endpoint': endpoint, 'type': error_type})
+
+    def _log_breaker_transition(self, base_url, transition):
+        """Log a state change of the circuit breaker of a server"""
+        if not transition:
+            return
+        previous, state = transition
+        status = {
+            circuit_breaker.OPEN: 'error',
+            circuit_breaker.HALF_OPEN: 'warning',
+            circuit_breaker.CLOSED: 'success',
+        }[state]
+        _logger.warning(f"SmartHive circuit breaker for {base_url}: {previous} -> {state}")
+        self.env['smarthive.client.status'].sudo().log_status(
+            'system', status, f"Circuit breaker for {base_url} is {state.replace('_', '-')}",
+            details=json.dumps({'server': base_url, 'from': previous, 'to': state}),
+        )
+
+    def _make_server_request(self, endpoint, method='POST', data=None, idempotent=None):
+        """Make API request to SmartHive server through the pooled session"""
+        if idempotent is None:
+            idempotent = method == 'GET'
         try:
-            url = f"{self.server_url.rstrip('/')}/smarthive/api/{endpoint}"
+            base_url = self.server_url.rstrip('/')
+            url = f"{base_url}/smarthive/api/{endpoint}"
             headers = self._get_api_headers()
+            read_timeout = circuit_breaker.adaptive_read_timeout(base_url, self.read_timeout or 30)
             
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method == 'POST':
+            # Fail fast while the server is known to be down
+            self._log_breaker_transition(base_url, circuit_breaker.before_request(base_url))
+            started = time.monotonic()
+            try:
                 # For Odoo JSON endpoints, we need to send data as JSON in the request body
-                response = requests.post(url, headers=headers, data=json.dumps(data or {}), timeout=30)
+                response = http_pool.send(
+                    base_url, method, url,
+                    headers=headers,
+                    data=json.dumps(data or {}) if method == 'POST' else None,
+                    connect_timeout=self.connect_timeout or 5,
+                    read_timeout=read_timeout,
+                    retries=max(self.max_retries, 0) if idempotent else 0,
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._log_breaker_transition(base_url, circuit_breaker.record_failure(base_url))
+                raise
+            if response.status_code >= 500:
+                self._log_breaker_transition(base_url, circuit_breaker.record_failure(base_url))
+            else:
+                self._log_breaker_transition(
+                    base_url, circuit_breaker.record_success(base_url, time.monotonic() - started))
             
             response.raise_for_status()
             
             # Handle different response types
             if response.content:
                 try:
-                    return response.json()
+                    result = response.json()
                 except json.JSONDecodeError:
+                    self._record_server_request(endpoint, 'invalid_response')
                     return {'success': False, 'error': 'Invalid JSON response from server'}
+                self._record_server_request(endpoint)
+                return result
             else:
+                self._record_server_request(endpoint, 'empty_response')
                 return {'success': False, 'error': 'Empty response from server'}
             
+        except circuit_breaker.CircuitOpenError as e:
+            self._record_server_request(endpoint, 'circuit_open')
+            return {'success': False, 'error': str(e), 'circuit_open': True}
         except requests.exceptions.ConnectionError as e:
+            self._record_server_request(endpoint, 'connection')
             error_msg = f"Cannot connect to server at {self.server_url}: {str(e)}"
             _logger.error(f"Connection error: {error_msg}")
             return {'success': False, 'error': error_msg}
         except requests.exceptions.Timeout as e:
-            error_msg = f"Request timeout (30s) to server: {str(e)}"
+            self._record_server_request(endpoint, 'timeout')
+            error_msg = f"Request timeout ({read_timeout:.1f}s) to server: {str(e)}"
             _logger.error(f"Timeout error: {error_msg}")
             return {'success': False, 'error': error_msg}
         except requests.exceptions.HTTPError as e:
+            self._record_server_request(endpoint, 'http')
             error_msg = f"HTTP error {e.response.status_code}: {str(e)}"
             _logger.error(f"HTTP error: {error_msg}")
             return {'success': False, 'error': error_msg}
         except requests.exceptions.RequestException as e:
+            self._record_server_request(endpoint, 'request')
             error_msg = f"Request failed: {str(e)}"
             _logger.error(f"Server request failed: {error_msg}")
             return {'success': False, 'error': error_msg}
         except Exception as e:
+            self._record_server_request(endpoint, 'unexpected')
             error_msg = f"Unexpected error: {str(e)}"
             _logger.error(f"Unexpected error in server request: {error_msg}")
             return {'success': False, 'error': error_msg}
@@ -211,48 +451,248 @@ class SmartHiveClientConfig(models.Model):
             error_message = result.get('error', 'Unknown error')
             raise UserError(_("Connection test failed: %s") % error_message)
 
+    def _register_hook(self):
+        """Collect static heartbeat metadata once per worker at registry load"""
+        super()._register_hook()
+        self._collect_static_metadata()
+
+    @api.model
+    def _collect_static_metadata(self):
+        """Read versions and installed modules, which only change with the registry"""
+        modules = self.env['ir.module.module'].sudo().search_read([('state', '=', 'installed')], ['name'])
+        metadata = {
+            'odoo_version': get_manifest('base').get('version', 'Unknown'),
+            'addon_version': get_manifest('smarthive_client').get('version', 'Unknown'),
+            'installed_modules': sorted(module['name'] for module in modules),
+        }
+        _static_metadata[self.env.cr.dbname] = metadata
+        return metadata
+
+    @api.model
+    def _get_static_metadata(self):
+        """Get static heartbeat metadata of this database"""
+        return _static_metadata.get(self.env.cr.dbname) or self._collect_static_metadata()
+
+    @api.model
+    def _get_instance_counts(self):
+        """Get cached user and company counts
+
+        Kept per worker for COUNTERS_CACHE_TTL seconds; creating or deleting
+        users and companies drops them in the current worker only.
+        """
+        dbname = self.env.cr.dbname
+        cached = _instance_counts.get(dbname)
+        if cached and cached[1] > time.monotonic():
+            metrics.inc(dbname, 'smarthive_cache_hits_total', {'method': '_get_instance_counts'})
+            return cached[0]
+        metrics.inc(dbname, 'smarthive_cache_misses_total', {'method': '_get_instance_counts'})
+        counts = (
+            self.env['res.users'].sudo().search_count([]),
+            self.env['res.company'].sudo().search_count([]),
+        )
+        _instance_counts[dbname] = (counts, time.monotonic() + COUNTERS_CACHE_TTL)
+        return counts
+
+    @api.model
+    def _invalidate_instance_counts(self):
+        """Drop the cached user and company counts of this database in this worker"""
+        _instance_counts.pop(self.env.cr.dbname, None)
+
+    def _get_heartbeat_metrics(self):
+        """Get the instance metrics reported with each heartbeat"""
+        users_count, companies_count = self._get_instance_counts()
+        return dict(
+            self._get_static_metadata(),
+            users_count=users_count,
+            companies_count=companies_count,
+        )
+
+    @staticmethod
+    def _heartbeat_state_fingerprint(result):
+        """Compute the fingerprint of the state carried by a heartbeat response"""
+        state = {key: result.get(key) for key in HEARTBEAT_STATE_KEYS}
+        canonical = json.dumps(state, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _prepare_heartbeat_payload(self, heartbeat_metrics):
+        """Build the heartbeat payload, only sending changed metrics in delta mode"""
+        data = {
+            'timestamp': fields.Datetime.now().isoformat(),
+            'capabilities': [HEARTBEAT_DELTA_CAPABILITY],
+        }
+        if self.delta_heartbeat and self.last_state_fingerprint:
+            previous = json.loads(self.last_reported_metrics or '{}')
+            data['delta'] = True
+            data['state_fingerprint'] = self.last_state_fingerprint
+            data.update({key: value for key, value in heartbeat_metrics.items() if previous.get(key) != value})
+        else:
+            data.update(heartbeat_metrics)
+        return data
+
+    def _apply_heartbeat_result(self, result, heartbeat_metrics):
+        """Apply a successful heartbeat response to the configuration"""
+        metrics_json = json.dumps(heartbeat_metrics, sort_keys=True)
+        supports_delta = HEARTBEAT_DELTA_CAPABILITY in (result.get('capabilities') or [])
+        
+        if result.get('unchanged') and self.last_state_fingerprint:
+            # Nothing changed on the server: the contact is stored with the schedule
+            if metrics_json != self.last_reported_metrics:
+                self.write({'last_reported_metrics': metrics_json})
+            return
+        
+        # Update local status based on server response, only writing what changed
+        # so an unchanged state keeps the cached enforcement state of every worker
+        values = self._get_changed_values({
+            'is_blocked': result.get('blocked', False),
+            'block_reason': result.get('block_reason', ''),
+            'show_warning': result.get('show_warning', False),
+            'warning_message': result.get('warning_message', ''),
+            'payment_status': result.get('payment_status', 'paid'),
+            'delta_heartbeat': supports_delta,
+            'last_state_fingerprint': result.get('state_fingerprint') or self._heartbeat_state_fingerprint(result),
+            'last_reported_metrics': metrics_json,
+        })
+        if values:
+            self.write(values)
+        
+        # Log status update
+        self.env['smarthive.client.status'].log_status('heartbeat', 'success',
+            'Heartbeat successful', details=json.dumps(result))
+
+    @staticmethod
+    def _command_values(command):
+        """Get the configuration values a server command sets"""
+        command_type = command.get('type')
+        if command_type == 'block':
+            return {
+                'is_blocked': command.get('blocked', True),
+                'block_reason': command.get('block_reason', 'Blocked by administrator'),
+            }
+        if command_type == 'unblock':
+            return {
+                'is_blocked': False,
+                'block_reason': '',
+            }
+        if command_type == 'warning':
+            return {
+                'show_warning': command.get('show_warning', False),
+                'warning_message': command.get('warning_message', ''),
+                'payment_status': command.get('payment_status', 'paid'),
+                'outstanding_amount': command.get('outstanding_amount', 0.0),
+            }
+        raise ValidationError(_("Unknown command type: %s", command_type))
+
+    def _apply_commands(self, commands):
+        """Apply an ordered batch of server commands with a single write
+
+        Commands whose ``key`` was already applied are skipped, so servers can
+        safely retry a batch. The configuration row is locked while the keys
+        are checked, and the whole batch is rejected if one command is invalid.
+        """
+        self.ensure_one()
+        self.env.cr.execute("SELECT id FROM smarthive_client_config WHERE id = %s FOR UPDATE", [self.id])
+        self.invalidate_recordset(['processed_command_keys'])
+        
+        keys = json.loads(self.processed_command_keys or '[]')
+        seen = set(keys)
+        vals = {}
+        applied = []
+        results = []
+        for command in commands:
+            if not isinstance(command, dict):
+                raise ValidationError(_("Commands must be objects"))
+            key = command.get('key')
+            if key and key in seen:
+                results.append({'key': key, 'status': 'duplicate'})
+                continue
+            vals.update(self._command_values(command))
+            applied.append(command)
+            results.append({'key': key, 'status': 'applied'})
+            if key:
+                seen.add(key)
+                keys.append(key)
+        
+        if not applied:
+            return results
+        vals['processed_command_keys'] = json.dumps(keys[-COMMAND_KEYS_LIMIT:])
+        self.write(vals)
+        
+        command_types = [command['type'] for command in applied]
+        # Block changes must reach the audit log, even when the batch holds warnings too
+        status_type = 'block' if {'block', 'unblock'}.intersection(command_types) else 'warning'
+        self.env['smarthive.client.status'].sudo().log_status(
+            status_type, 'info',
+            f"Applied {len(applied)} server commands: {', '.join(command_types)}",
+            details=json.dumps({'commands': applied, 'skipped': len(commands) - len(applied)}),
+            durable=True,
+        )
+        return results
+
+    def _schedule_next_heartbeat(self, success):
+        """Store when the next heartbeat is due, with jitter and backoff after errors
+
+        A single UPDATE, so heartbeats acknowledged as unchanged stay cheap.
+        Successful heartbeats record the server contact as well.
+        """
+        self.ensure_one()
+        now = fields.Datetime.now()
+        failures = 0 if success else self.heartbeat_failures + 1
+        interval = max(self.heartbeat_interval, 1) * 60
+        if failures:
+            # Failing configurations never retry less often than they would heartbeat
+            delay = min(interval, HEARTBEAT_BACKOFF_MAX, HEARTBEAT_BACKOFF_BASE * 2 ** min(failures - 1, 16))
+        else:
+            delay = interval
+        delay *= 1 + random.uniform(-HEARTBEAT_JITTER, HEARTBEAT_JITTER)
+        self.env.cr.execute("""
+            UPDATE smarthive_client_config
+               SET next_heartbeat_at = %s,
+                   heartbeat_failures = %s,
+                   last_server_contact = CASE WHEN %s THEN %s ELSE last_server_contact END
+             WHERE id = %s
+        """, [now + timedelta(seconds=delay), failures, bool(success), now, self.id])
+        self.invalidate_recordset(['next_heartbeat_at', 'heartbeat_failures', 'last_server_contact'])
+
+    @api.model
+    def _trigger_heartbeat_cron(self, at=None):
+        """Wake the heartbeat cron up at ``at``, or right away"""
+        cron = self.env.ref('smarthive_client.cron_smarthive_client_heartbeat', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    def _process_heartbeat_result(self, result, heartbeat_metrics):
+        """Apply a heartbeat response, successful or not, and schedule the next heartbeat"""
+        if result.get('success'):
+            self._apply_heartbeat_result(result, heartbeat_metrics)
+        elif result.get('resync'):
+            # Server lost our acknowledged state, send a full heartbeat next time
+            self.write({'last_state_fingerprint': False, 'last_reported_metrics': False})
+        self._schedule_next_heartbeat(result.get('success'))
+
+    @profiled('send_heartbeat')
     def send_heartbeat(self):
         """Send heartbeat to server and get current status"""
         try:
-            data = {
-                'odoo_version': self.env['ir.module.module'].get_module_info('base').get('version', 'Unknown'),
-                'addon_version': '17.0.1.0.0',
-                'timestamp': fields.Datetime.now().isoformat(),
-                'users_count': self.env['res.users'].search_count([]),
-                'companies_count': self.env['res.company'].search_count([]),
-            }
+            heartbeat_metrics = self._get_heartbeat_metrics()
+            data = self._prepare_heartbeat_payload(heartbeat_metrics)
             
-            result = self._make_server_request('client/heartbeat', data=data)
+            started = time.monotonic()
+            result = self._make_server_request('client/heartbeat', data=data, idempotent=True)
+            metrics.observe(self.env.cr.dbname, 'smarthive_heartbeat_duration_seconds', time.monotonic() - started,
+                            {'outcome': 'success' if result.get('success') else 'error'})
             
-            if result.get('success'):
-                # Update local status based on server response
-                self.write({
-                    'is_blocked': result.get('blocked', False),
-                    'block_reason': result.get('block_reason', ''),
-                    'show_warning': result.get('show_warning', False),
-                    'warning_message': result.get('warning_message', ''),
-                    'payment_status': result.get('payment_status', 'paid'),
-                    'last_server_contact': fields.Datetime.now(),
-                })
-                
-                # Log status update
-                self.env['smarthive.client.status'].create({
-                    'status_type': 'heartbeat',
-                    'status': 'success',
-                    'message': 'Heartbeat successful',
-                    'details': json.dumps(result),
-                })
+            self._process_heartbeat_result(result, heartbeat_metrics)
             
             return result
             
         except Exception as e:
             _logger.error(f"Heartbeat failed: {str(e)}")
             # Log failed heartbeat
-            self.env['smarthive.client.status'].create({
-                'status_type': 'heartbeat',
-                'status': 'error',
-                'message': f'Heartbeat failed: {str(e)}',
-            })
+            self.env['smarthive.client.status'].log_status('heartbeat', 'error', f'Heartbeat failed: {str(e)}')
+            try:
+                self._schedule_next_heartbeat(False)
+            except Exception as schedule_error:
+                _logger.error(f"Cannot schedule the next heartbeat: {str(schedule_error)}")
             return {'success': False, 'error': str(e)}
 
     def send_status_update(self, status_data):
@@ -270,36 +710,440 @@ class SmartHiveClientConfig(models.Model):
             return {'success': False, 'error': str(e)}
 
     @api.model
-    def cron_heartbeat(self):
-        """Cron job to send regular heartbeat to server"""
-        configs = self.search([
+    def get_connection_pool_stats(self):
+        """Get statistics of the pooled server connections of this worker"""
+        if not self.env.user.has_group('base.group_system'):
+            raise UserError(_('Only system administrators can view connection statistics'))
+        stats = http_pool.pool_stats()
+        for base_url, server_stats in stats.items():
+            breaker = circuit_breaker.breaker_state(base_url)
+            server_stats.update(
+                circuit_state=breaker['state'],
+                consecutive_failures=breaker['failures'],
+            )
+        return stats
+
+    def _send_heartbeat_in_new_cursor(self, config_id):
+        """Send the heartbeat of one configuration on its own cursor and commit it
+
+        A transaction-level advisory lock skips configurations whose heartbeat
+        is still running from an earlier cron run. Cache invalidations are
+        flagged per thread, so they are signalled to the other workers here.
+        """
+        try:
+            with self.pool.cursor() as cr:
+                cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [HEARTBEAT_LOCK_NAMESPACE, config_id])
+                if not cr.fetchone()[0]:
+                    return {'success': False, 'skipped': True}
+                env = api.Environment(cr, self.env.uid, self.env.context)
+                result = env[self._name].browse(config_id).send_heartbeat()
+        except Exception:
+            self.pool.reset_changes()
+            raise
+        self.pool.signal_changes()
+        return result
+
+    def _run_heartbeats_concurrently(self, config_ids, concurrency, deadline):
+        """Send heartbeats on a bounded thread pool within a deadline
+
+        Queued heartbeats are dropped at the deadline and running ones get a
+        bounded grace period to finish. Returns the number of heartbeats that
+        succeeded, failed and did not finish before the deadline.
+        """
+        succeeded = failed = 0
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='smarthive_heartbeat')
+        try:
+            futures = {executor.submit(self._send_heartbeat_in_new_cursor, config_id): config_id
+                       for config_id in config_ids}
+            done, not_done = wait(futures, timeout=deadline)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+                if result.get('skipped'):
+                    _logger.info(f"Cron heartbeat for config {futures[future]} is still running, skipped")
+                elif result.get('success'):
+                    succeeded += 1
+                else:
+                    failed += 1
+                    _logger.error(f"Cron heartbeat failed for config {futures[future]}: {result.get('error')}")
+            for future in not_done:
+                _logger.warning(f"Cron heartbeat for config {futures[future]} missed the {deadline}s deadline")
+                future.cancel()
+            running = [future for future in not_done if not future.cancelled()]
+            if running:
+                # Running heartbeats commit on their own cursor, do not leave them behind
+                _done, stuck = wait(running, timeout=HEARTBEAT_SHUTDOWN_GRACE)
+                for future in stuck:
+                    _logger.error(f"Cron heartbeat for config {futures[future]} still running "
+                                  f"{HEARTBEAT_SHUTDOWN_GRACE}s after the deadline")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return succeeded, failed, len(not_done)
+
+    @api.model
+    def _heartbeat_domain(self):
+        """Domain of the configurations sending heartbeats"""
+        return [
             ('active', '=', True),
+            ('local_admin_mode', '=', False),
+            ('server_url', '!=', False),
+            ('client_id', '!=', False),
+            ('api_key', '!=', False),
+        ]
+
+    @api.model
+    def _get_due_heartbeat_configs(self):
+        """Get the configurations whose heartbeat is due, through the next_heartbeat_at index"""
+        return self.search(self._heartbeat_domain() + [
+            '|', ('next_heartbeat_at', '=', False), ('next_heartbeat_at', '<=', fields.Datetime.now()),
         ])
+
+    @api.model
+    def _get_next_heartbeat_at(self):
+        """Get when the earliest scheduled heartbeat is due"""
+        next_config = self.search(self._heartbeat_domain(), order='next_heartbeat_at', limit=1)
+        return next_config.next_heartbeat_at
+
+    @api.model
+    def _prepare_heartbeat_batch(self):
+        """Build the heartbeats of the due configurations for an aggregated run"""
+        entries = []
+        for config in self._get_due_heartbeat_configs():
+            heartbeat_metrics = config._get_heartbeat_metrics()
+            entries.append({
+                'config_id': config.id,
+                'base_url': config.server_url.rstrip('/'),
+                'client_id': config.client_id,
+                'api_key': config.api_key,
+                'connect_timeout': config.connect_timeout or 5,
+                'read_timeout': config.read_timeout or 30,
+                'max_retries': max(config.max_retries, 0),
+                'payload': config._prepare_heartbeat_payload(heartbeat_metrics),
+                'metrics': heartbeat_metrics,
+            })
+        return entries
+
+    @api.model
+    def _apply_heartbeat_batch(self, entries):
+        """Apply the answers of an aggregated heartbeat run to their configurations
+
+        Returns the number of heartbeats that succeeded and failed.
+        """
+        succeeded = failed = 0
+        for entry in entries:
+            # The aggregator bypasses _make_server_request, count its requests as sent for this database
+            self._record_server_request(entry['endpoint'], entry['error_type'])
+            metrics.observe(self.env.cr.dbname, 'smarthive_heartbeat_duration_seconds', entry['duration'],
+                            {'outcome': 'success' if entry['result'].get('success') else 'error'})
+            config = self.browse(entry['config_id']).exists()
+            if not config:
+                continue
+            result = entry['result']
+            try:
+                with self.env.cr.savepoint():
+                    config._process_heartbeat_result(result, entry['metrics'])
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            if result.get('success'):
+                succeeded += 1
+            else:
+                failed += 1
+                _logger.error(f"Aggregated heartbeat failed for config {config.id}: {result.get('error')}")
+        return succeeded, failed
+
+    @api.model
+    def _send_due_heartbeats(self):
+        """Send the heartbeats of the due configurations of this database"""
+        due_configs = self._get_due_heartbeat_configs()
         
-        for config in configs:
+        params = self.env['ir.config_parameter'].sudo()
+        concurrency = int(params.get_param('smarthive_client.heartbeat_concurrency', 1))
+        deadline = int(params.get_param('smarthive_client.heartbeat_deadline', 600))
+        
+        if concurrency > 1 and len(due_configs) > 1:
+            succeeded, failed, timed_out = self._run_heartbeats_concurrently(
+                due_configs.ids, concurrency, deadline)
+        else:
+            succeeded = failed = timed_out = 0
+            for config in due_configs:
+                try:
+                    if config.send_heartbeat().get('success'):
+                        succeeded += 1
+                    else:
+                        failed += 1
+                except Exception as e:
+                    failed += 1
+                    _logger.error(f"Cron heartbeat failed for config {config.id}: {str(e)}")
+        
+        return {
+            'configs': len(due_configs),
+            'succeeded': succeeded,
+            'failed': failed,
+            'timed_out': timed_out,
+            'concurrency': concurrency,
+        }
+
+    @api.model
+    def cron_heartbeat(self):
+        """Cron job to send regular heartbeat to server
+
+        With the ``smarthive_aggregator_db`` server option, the cron of that
+        database sends the heartbeats of every database in batches, and the
+        crons of the other databases only wake it up. They send their own
+        heartbeats when that database is unreachable or lacks the addon.
+        """
+        aggregator_db = heartbeat_aggregator.aggregator_db()
+        if aggregator_db and aggregator_db != self.env.cr.dbname:
+            if not self._get_due_heartbeat_configs():
+                return
             try:
-                # Skip heartbeat if in local admin mode or server not configured
-                if config.local_admin_mode or not all([config.server_url, config.client_id, config.api_key]):
-                    continue
-                    
-                # Check if it's time for heartbeat
-                if (not config.last_server_contact or 
-                    (fields.Datetime.now() - config.last_server_contact).total_seconds() >= config.heartbeat_interval * 60):
-                    config.send_heartbeat()
+                if heartbeat_aggregator.is_available(aggregator_db) and heartbeat_aggregator.trigger(aggregator_db):
+                    return
+                _logger.warning(f"Heartbeat aggregator database {aggregator_db} is unavailable, "
+                                f"sending heartbeats locally")
             except Exception as e:
-                _logger.error(f"Cron heartbeat failed for config {config.id}: {str(e)}")
+                _logger.warning(f"Cannot wake heartbeat aggregator database {aggregator_db} up, "
+                                f"sending heartbeats locally: {str(e)}")
+            aggregator_db = None
+        
+        started = time.monotonic()
+        if aggregator_db:
+            run = heartbeat_aggregator.run(self.env)
+            next_heartbeat_at = run.pop('next_heartbeat_at')
+        else:
+            run = self._send_due_heartbeats()
+            next_heartbeat_at = self._get_next_heartbeat_at()
+        
+        if run['configs']:
+            duration = time.monotonic() - started
+            _logger.info(f"Cron heartbeat sent {run['configs']} heartbeats in {duration:.2f}s "
+                         f"({run['succeeded']} succeeded, {run['failed']} failed, {run['timed_out']} timed out)")
+            self.env['smarthive.client.status'].sudo().log_status(
+                'system',
+                'success' if not (run['failed'] or run['timed_out']) else 'warning',
+                f'Heartbeat cron run took {duration:.2f}s',
+                details=json.dumps(dict(run, duration=round(duration, 3))),
+            )
+        
+        # Do not leave heartbeat log entries waiting in this worker's buffer
+        self.env['smarthive.client.status'].flush_log_buffer()
+        # Cron workers serve no routes, publish their metrics here
+        metrics.flush(self.env.cr.dbname)
+        
+        # Wake up again when the next configuration is due instead of at the next tick
+        # Overdue configurations (missed deadline, unschedulable) wait at least a minute
+        if next_heartbeat_at:
+            self._trigger_heartbeat_cron(max(next_heartbeat_at, fields.Datetime.now() + timedelta(minutes=1)))
 
     @api.model
+    def cron_command_channel(self):
+        """Keep the long-poll command channels of this database running
+
+        Scheduled from cron workers, so channel threads never live in an HTTP
+        worker; a file lease keeps a single subscriber per configuration.
+        """
+        # Channel threads poll forever and would outlive the test that started them
+        if self.env.registry.in_test_mode():
+            return
+        configs = self.search([
+            ('active', '=', True),
+            ('command_channel', '=', True),
+            ('local_admin_mode', '=', False),
+        ])
+        for config in configs:
+            if command_channel.ensure_running(self.env.cr.dbname, config.id):
+                _logger.info(f"Started SmartHive command channel for config {config.id}")
+
+    @api.model
+    @profiled('get_active_config')
     def get_active_config(self):
         """Get active SmartHive configuration"""
         return self.search([('active', '=', True)], limit=1)
 
+    @api.model
+    @tools.ormcache()
+    def _get_profiling_settings(self):
+        """Get whether profiling is on, its slow-call threshold (ms) and sample rate (%)
+
+        Cached in the registry; changing a parameter clears the cache.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        return (
+            bool(params.get_param('smarthive_client.profiling')),
+            int(params.get_param('smarthive_client.profiling_threshold_ms', 500)),
+            float(params.get_param('smarthive_client.profiling_sample_rate', 0)),
+        )
+
+    @api.model
+    @tools.ormcache()
+    def _get_enforcement_state(self):
+        """Get cached enforcement state of the active configuration
+
+        The snapshot is kept in the registry cache, so it costs no query until
+        a configuration change clears the cache and signals the other workers.
+        """
+        config = self.sudo().search([('active', '=', True)], limit=1)
+        if not config:
+            return None
+        return EnforcementState(
+            config_id=config.id,
+            is_blocked=config.is_blocked,
+            block_reason=config.block_reason or '',
+            show_warning=config.show_warning,
+            message=config.warning_message or '',
+            payment_status=config.payment_status,
+            outstanding_amount=config.outstanding_amount,
+            local_admin_mode=config.local_admin_mode,
+            state_version=config.state_version,
+        )
+
+    @api.model
+    def _lookup_api_credentials(self, client_id):
+        """Get the id and API key hash of the active config of a client
+
+        Found credentials are kept in a small per-worker LRU for AUTH_CACHE_TTL
+        seconds, stamped with the registry cache sequence shared by all
+        workers: credential changes clear the registry cache, so entries read
+        before them are rejected everywhere. Unknown client ids are not
+        cached, so requests with arbitrary ids cannot evict the known ones.
+        """
+        dbname = self.env.cr.dbname
+        key = (dbname, client_id)
+        # Read before the lookup, so a concurrent change leaves the entry stale
+        sequence = self.env.registry.cache_sequences.get('default')
+        with _api_credentials_lock:
+            cached = _api_credentials.get(key)
+            if cached and cached[2] > time.monotonic() and cached[3] == sequence:
+                _api_credentials.move_to_end(key)
+            else:
+                cached = None
+        if cached:
+            metrics.inc(dbname, 'smarthive_cache_hits_total', {'method': '_lookup_api_credentials'})
+            return cached[0], cached[1]
+        metrics.inc(dbname, 'smarthive_cache_misses_total', {'method': '_lookup_api_credentials'})
+        
+        config = self.sudo().search([('client_id', '=', client_id), ('active', '=', True)], limit=1)
+        if not config:
+            return False, ''
+        with _api_credentials_lock:
+            _api_credentials[key] = (config.id, config.api_key_hash or '', time.monotonic() + AUTH_CACHE_TTL, sequence)
+            _api_credentials.move_to_end(key)
+            while len(_api_credentials) > AUTH_CACHE_SIZE:
+                _api_credentials.popitem(last=False)
+        return config.id, config.api_key_hash or ''
+
+    @api.model
+    def _invalidate_api_credentials(self):
+        """Drop the cached credential lookups of this database in every worker
+
+        Local entries are dropped right away and again after commit; clearing
+        the registry cache moves the shared sequence their stamps are checked
+        against, so the other workers reject theirs on their next request.
+        """
+        dbname = self.env.cr.dbname
+        self.env.registry.clear_cache()
+
+        def invalidate():
+            with _api_credentials_lock:
+                for key in [key for key in _api_credentials if key[0] == dbname]:
+                    del _api_credentials[key]
+
+        invalidate()
+        self.env.cr.postcommit.add(invalidate)
+
+    @api.model
+    def _authenticate_api_key(self, client_id, api_key):
+        """Get the active configuration matching API credentials of a request"""
+        if not client_id or not api_key:
+            return self.browse()
+        config_id, key_hash = self._lookup_api_credentials(client_id)
+        if not config_id or not hmac.compare_digest(key_hash, self._hash_api_key(api_key)):
+            return self.browse()
+        # Archiving is re-checked on the record, not only through the cache
+        config = self.sudo().browse(config_id).exists()
+        return config if config.active else self.browse()
+
+    @api.model
+    def _get_state_token(self):
+        """Get the opaque version token of the cached enforcement state"""
+        state = self._get_enforcement_state()
+        if not state:
+            return '0-0'
+        return f'{state.config_id}-{state.state_version}'
+
+    def _bump_state_version(self):
+        """Increment the state version of the records in place"""
+        if not self.ids:
+            return
+        self.env.cr.execute(
+            "UPDATE smarthive_client_config SET state_version = state_version + 1 WHERE id IN %s",
+            (tuple(self.ids),)
+        )
+        self.invalidate_recordset(['state_version'])
+
+    def _get_changed_values(self, vals):
+        """Get the values of ``vals`` differing from those stored on the record"""
+        self.ensure_one()
+        changed = {}
+        for name, value in vals.items():
+            field = self._fields[name]
+            value = field.convert_to_record(field.convert_to_cache(value, self), self)
+            # Empty strings, zeros and False are all stored as empty
+            if (value or False) != (self[name] or False):
+                changed[name] = vals[name]
+        return changed
+
+    def _get_enforcement_changes(self, vals):
+        """Get the records whose enforcement state would change by writing ``vals``"""
+        enforcement_vals = {name: vals[name] for name in ENFORCEMENT_FIELDS.intersection(vals)}
+        if not enforcement_vals:
+            return self.browse()
+        return self.filtered(lambda config: config._get_changed_values(enforcement_vals))
+
+    @api.model
+    def _invalidate_enforcement_state(self):
+        """Drop the cached enforcement state in every worker"""
+        self.env.registry.clear_cache()
+
+    @api.model
+    def _notify_state_change(self):
+        """Push the current warning/block state to connected web clients"""
+        config = self.sudo().get_active_config()
+        payload = (config and config.get_warning_data()) or {'show_warning': False}
+        payload['version'] = f'{config.id}-{config.state_version}' if config else '0-0'
+        self.env['bus.bus']._sendone(STATE_BUS_CHANNEL, STATE_BUS_TYPE, payload)
+
     def _check_access_allowed(self):
         """Check if user access is allowed (not blocked)"""
         if self.is_blocked:
             return False
         return True
 
+    @api.model
+    def get_cached_warning_data(self):
+        """Get warning data for display from the cached enforcement state"""
+        state = self._get_enforcement_state()
+        if not state or not (state.show_warning or state.is_blocked):
+            return None
+
+        return {
+            'show_warning': True,
+            'message': state.message or 'System notification from administrator',
+            'payment_status': state.payment_status,
+            'outstanding_amount': state.outstanding_amount,
+            'block_reason': state.block_reason if state.is_blocked else None,
+            'local_admin_mode': state.local_admin_mode,
+        }
+
+    @api.model
+    def _get_warning_payload(self):
+        """Get the versioned warning payload sent to web clients"""
+        data = self.get_cached_warning_data() or {'show_warning': False}
+        data['version'] = self._get_state_token()
+        return data
+
     def get_warning_data(self):
         """Get current warning data for display"""
         # Show warnings if client is blocked OR if warning banner is enabled
@@ -327,11 +1171,7 @@ class SmartHiveClientConfig(models.Model):
         })
         
         # Log the block action
-        self.env['smarthive.client.status'].create({
-            'status_type': 'block',
-            'status': 'warning', 
-            'message': f'Local admin blocked client access',
-        })
+        self.env['smarthive.client.status'].log_status('block', 'warning', f'Local admin blocked client access')
         
         return {
             'type': 'ir.actions.client',
@@ -354,11 +1194,7 @@ class SmartHiveClientConfig(models.Model):
         })
         
         # Log the unblock action
-        self.env['smarthive.client.status'].create({
-            'status_type': 'block',
-            'status': 'success',
-            'message': 'Local admin unblocked client access',
-        })
+        self.env['smarthive.client.status'].log_status('block', 'success', 'Local admin unblocked client access')
         
         return {
             'type': 'ir.actions.client',
@@ -403,9 +1239,45 @@ class SmartHiveClientConfig(models.Model):
             
         raise UserError(_('Only system administrators can perform this action'))
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to invalidate the cached enforcement state"""
+        records = super().create(vals_list)
+        self._invalidate_enforcement_state()
+        self._notify_state_change()
+        if not all(records.mapped('local_admin_mode')):
+            self._trigger_heartbeat_cron()
+        return records
+
     def write(self, vals):
         """Override write to check permissions for local admin mode changes"""
         if 'local_admin_mode' in vals or 'local_admin_user_id' in vals:
             if not (self.env.user.has_group('base.group_system') or self.env.user.id == 1):
                 raise UserError(_('Only system administrators can modify local admin settings'))
-        return super().write(vals)
\ No newline at end of file
+        heartbeat_now = bool(HEARTBEAT_TRIGGER_FIELDS.intersection(vals))
+        if heartbeat_now:
+            vals = dict(vals, next_heartbeat_at=False)
+        # Rewriting identical values must not flush the registry cache of every worker
+        enforcement_changes = self._get_enforcement_changes(vals)
+        result = super().write(vals)
+        if heartbeat_now:
+            self._trigger_heartbeat_cron()
+        if enforcement_changes:
+            enforcement_changes._bump_state_version()
+            self._invalidate_enforcement_state()
+            self._notify_state_change()
+        if AUTH_FIELDS.intersection(vals):
+            self._invalidate_api_credentials()
+        if vals.get('command_channel') is False or vals.get('active') is False:
+            # Channels of other processes notice on their next poll
+            for config in self:
+                command_channel.stop(self.env.cr.dbname, config.id)
+        return result
+
+    def unlink(self):
+        """Override unlink to invalidate the cached enforcement state"""
+        result = super().unlink()
+        self._invalidate_enforcement_state()
+        self._invalidate_api_credentials()
+        self._notify_state_change()
+        return result
\ No newline at end of file
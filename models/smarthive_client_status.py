@@ -1,6 +1,51 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models, _
+import atexit
+import logging
+import threading
+import time
+from datetime import date, timedelta
+
+from odoo import api, fields, models, SUPERUSER_ID, _
+from odoo.modules.registry import Registry
+
+_logger = logging.getLogger(__name__)
+
+# Default retention policy, overridable through system parameters
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_RETENTION_MAX_ROWS = 100000
+DEFAULT_PURGE_BATCH_SIZE = 5000
+
+# Number of months of partitions created ahead of time
+PARTITIONS_AHEAD = 2
+
+# Worker log buffer thresholds
+LOG_BUFFER_SIZE = 50
+LOG_BUFFER_MAX_AGE = 30
+
+# Status types always written immediately in the current transaction
+STRICT_STATUS_TYPES = {'block'}
+
+# Columns written by the multi-row insert
+LOG_COLUMNS = ('status_type', 'status', 'message', 'details', 'create_date', 'create_uid', 'write_date', 'write_uid')
+
+# Per-worker buffer of non-durable entries, keyed by database name
+_log_buffer = {}
+_log_buffer_lock = threading.Lock()
+
+
+@atexit.register
+def _flush_log_buffers_at_exit():
+    """Write what is left in the buffers when a worker exits, e.g. once recycled"""
+    for dbname in [dbname for dbname, buffer in _log_buffer.items() if buffer['entries']]:
+        registry = Registry.registries.get(dbname)
+        if registry is None:
+            continue
+        try:
+            with registry.cursor() as cr:
+                api.Environment(cr, SUPERUSER_ID, {})['smarthive.client.status'].flush_log_buffer()
+        except Exception as e:
+            _logger.error(f"Failed to flush status log entries at exit: {str(e)}")
 
 
 class SmartHiveClientStatus(models.Model):
@@ -34,15 +79,269 @@ class SmartHiveClientStatus(models.Model):
     
     create_date = fields.Datetime(
         string='Date',
-        readonly=True
+        readonly=True,
+        index=True
     )
 
     @api.model
-    def log_status(self, status_type, status, message, details=None):
-        """Helper method to log client status"""
-        return self.create({
-            'status_type': status_type,
-            'status': status,
-            'message': message,
-            'details': details,
-        })
\ No newline at end of file
+    def log_status(self, status_type, status, message, details=None, durable=False):
+        """Helper method to log client status
+
+        Audit-critical entries (blocks and unblocks, or every entry when the
+        ``smarthive_client.status_log_strict`` parameter is set) are created
+        right away. Durable entries are inserted together just before the
+        current transaction commits. Other entries go to a per-worker buffer
+        flushed with a single insert once it is full or old enough, checked
+        on every HTTP request and when the worker exits. A killed worker
+        loses the entries buffered since its last flush.
+        Only immediately created entries are returned.
+        """
+        if status_type in STRICT_STATUS_TYPES or self._is_strict_logging():
+            return self.sudo().create({
+                'status_type': status_type,
+                'status': status,
+                'message': message,
+                'details': details,
+            })
+        
+        entry = (status_type, status, message, details, fields.Datetime.now(), self.env.uid)
+        if durable:
+            self._add_precommit_entry(entry)
+        else:
+            self._add_buffered_entry(entry)
+        return self.browse()
+
+    def _is_strict_logging(self):
+        return bool(self.env['ir.config_parameter'].sudo().get_param('smarthive_client.status_log_strict'))
+
+    def _insert_entries(self, cr, entries):
+        """Insert status entries with a single multi-row INSERT"""
+        placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(entries))
+        params = []
+        for status_type, status, message, details, create_date, uid in entries:
+            params.extend([status_type, status, message, details, create_date, uid, create_date, uid])
+        cr.execute(
+            f"INSERT INTO {self._table} ({', '.join(LOG_COLUMNS)}) VALUES {placeholders}",
+            params
+        )
+
+    def _add_precommit_entry(self, entry):
+        """Queue a durable entry, inserted with the others before commit"""
+        cr = self.env.cr
+        entries = cr.precommit.data.get('smarthive_client.status_entries')
+        if entries is None:
+            entries = cr.precommit.data['smarthive_client.status_entries'] = []
+
+            @cr.precommit.add
+            def flush_entries():
+                pending = cr.precommit.data.pop('smarthive_client.status_entries', [])
+                if pending:
+                    self._insert_entries(cr, pending)
+        entries.append(entry)
+
+    def _add_buffered_entry(self, entry):
+        """Queue a non-durable entry in the worker buffer, flushing it when due"""
+        dbname = self.env.cr.dbname
+        with _log_buffer_lock:
+            buffer = _log_buffer.setdefault(dbname, {'entries': [], 'since': time.monotonic()})
+            if not buffer['entries']:
+                buffer['since'] = time.monotonic()
+            buffer['entries'].append(entry)
+            due = (len(buffer['entries']) >= LOG_BUFFER_SIZE
+                   or time.monotonic() - buffer['since'] >= LOG_BUFFER_MAX_AGE)
+        if due:
+            self.flush_log_buffer()
+
+    @api.model
+    def flush_log_buffer_if_due(self):
+        """Flush the worker buffer once its oldest entry is LOG_BUFFER_MAX_AGE old"""
+        buffer = _log_buffer.get(self.env.cr.dbname)
+        if not buffer or not buffer['entries'] or time.monotonic() - buffer['since'] < LOG_BUFFER_MAX_AGE:
+            return 0
+        return self.flush_log_buffer()
+
+    def _log_buffer_cursor(self):
+        """Get the cursor buffered entries are written on, outside the current transaction"""
+        return self.pool.cursor()
+
+    @api.model
+    def flush_log_buffer(self):
+        """Write the buffered entries of this worker on a separate cursor"""
+        with _log_buffer_lock:
+            buffer = _log_buffer.get(self.env.cr.dbname)
+            if not buffer or not buffer['entries']:
+                return 0
+            entries, buffer['entries'] = buffer['entries'], []
+        try:
+            with self._log_buffer_cursor() as cr:
+                self._insert_entries(cr, entries)
+        except Exception as e:
+            _logger.error(f"Failed to flush {len(entries)} status log entries: {str(e)}")
+            return 0
+        return len(entries)
+
+    # Retention
+
+    def _get_retention_policy(self):
+        """Get retention days, row limit and batch size from system parameters"""
+        params = self.env['ir.config_parameter'].sudo()
+        return (
+            int(params.get_param('smarthive_client.status_retention_days', DEFAULT_RETENTION_DAYS)),
+            int(params.get_param('smarthive_client.status_retention_max_rows', DEFAULT_RETENTION_MAX_ROWS)),
+            max(int(params.get_param('smarthive_client.status_purge_batch_size', DEFAULT_PURGE_BATCH_SIZE)), 1),
+        )
+
+    def _commit_batch(self):
+        """Commit a purge batch so locks and WAL stay small (not in tests)"""
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+
+    def _delete_in_batches(self, where, params, batch_size):
+        """Delete the rows matching ``where`` in bounded batches"""
+        deleted = 0
+        while True:
+            self.env.cr.execute(f"""
+                DELETE FROM {self._table}
+                 WHERE id IN (SELECT id FROM {self._table} WHERE {where} ORDER BY id LIMIT %s)
+            """, (*params, batch_size))
+            # Committing runs precommit hooks, which may execute queries of their own
+            rowcount = self.env.cr.rowcount
+            deleted += rowcount
+            self._commit_batch()
+            if rowcount < batch_size:
+                return deleted
+
+    @api.model
+    def cron_purge_status_log(self):
+        """Cron job enforcing the status log retention policy"""
+        self.flush_log_buffer()
+        retention_days, max_rows, batch_size = self._get_retention_policy()
+        params = self.env['ir.config_parameter'].sudo()
+        deleted = 0
+        
+        if params.get_param('smarthive_client.status_partitioning'):
+            self._ensure_partitioned()
+            self._ensure_partitions()
+            if retention_days > 0:
+                self._drop_expired_partitions(fields.Datetime.now() - timedelta(days=retention_days))
+        
+        if retention_days > 0:
+            cutoff = fields.Datetime.now() - timedelta(days=retention_days)
+            deleted += self._delete_in_batches("create_date < %s", (cutoff,), batch_size)
+        
+        if max_rows > 0:
+            self.env.cr.execute(f"""
+                SELECT create_date, id FROM {self._table}
+                 ORDER BY create_date DESC, id DESC
+                OFFSET %s LIMIT 1
+            """, (max_rows,))
+            row = self.env.cr.fetchone()
+            if row:
+                deleted += self._delete_in_batches("(create_date, id) <= (%s, %s)", row, batch_size)
+        
+        if deleted:
+            self.invalidate_model()
+            _logger.info(f"Status log retention removed {deleted} entries")
+        return deleted
+
+    # Monthly partitioning
+
+    def _is_partitioned(self):
+        """Check whether the status log table is partitioned"""
+        self.env.cr.execute("SELECT relkind FROM pg_class WHERE relname = %s", (self._table,))
+        row = self.env.cr.fetchone()
+        return bool(row and row[0] == 'p')
+
+    def _partition_name(self, month):
+        return f"{self._table}_p{month:%Y%m}"
+
+    @staticmethod
+    def _next_month(month):
+        return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+    def _create_partition(self, month):
+        """Create the partition holding the rows of ``month`` if missing
+
+        Rows of that month already in the default partition, e.g. after the
+        purge cron was skipped, are moved into the new table before it is
+        attached, as PostgreSQL refuses the attach otherwise.
+        """
+        name = self._partition_name(month)
+        cr = self.env.cr
+        cr.execute("SELECT 1 FROM pg_class WHERE relname = %s", (name,))
+        if cr.fetchone():
+            return
+        bounds = (month, self._next_month(month))
+        cr.execute(f"CREATE TABLE {name} (LIKE {self._table} INCLUDING DEFAULTS)")
+        cr.execute(f"""
+            WITH moved AS (
+                DELETE FROM {self._table}_pdefault
+                 WHERE create_date >= %s AND create_date < %s
+             RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """, bounds)
+        cr.execute(f"ALTER TABLE {self._table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", bounds)
+
+    def _ensure_partitioned(self):
+        """Convert the status log into a table partitioned by month of create_date
+
+        The primary key is replaced by an index on id, as PostgreSQL requires
+        the partition key in primary keys and create_date stays nullable for
+        the ORM. Rows without a date land in the default partition.
+        """
+        if self._is_partitioned():
+            return
+        table = self._table
+        legacy = f"{table}_legacy"
+        cr = self.env.cr
+        _logger.info(f"Converting {table} to monthly partitions")
+        cr.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cr.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        cr.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        cr.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT IF EXISTS {table}_pkey")
+        cr.execute(f"""
+            CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS)
+            PARTITION BY RANGE (create_date)
+        """)
+        cr.execute(f"CREATE TABLE {table}_pdefault PARTITION OF {table} DEFAULT")
+        cr.execute(f"SELECT min(create_date) FROM {legacy}")
+        oldest = cr.fetchone()[0]
+        month = (oldest.date() if oldest else date.today()).replace(day=1)
+        while month <= date.today():
+            self._create_partition(month)
+            month = self._next_month(month)
+        cr.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+        cr.execute(f"DROP TABLE {legacy}")
+        cr.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        cr.execute(f"CREATE INDEX {table}_id_index ON {table} (id)")
+        cr.execute(f"CREATE INDEX {table}__create_date_index ON {table} (create_date)")
+        self._commit_batch()
+
+    def _ensure_partitions(self):
+        """Create the partitions of the current and upcoming months"""
+        month = date.today().replace(day=1)
+        for _i in range(PARTITIONS_AHEAD + 1):
+            self._create_partition(month)
+            month = self._next_month(month)
+
+    def _drop_expired_partitions(self, cutoff):
+        """Drop the monthly partitions entirely older than ``cutoff``"""
+        self.env.cr.execute("""
+            SELECT child.relname
+              FROM pg_inherits
+              JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+              JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+             WHERE parent.relname = %s
+        """, (self._table,))
+        prefix = f"{self._table}_p"
+        for (name,) in self.env.cr.fetchall():
+            suffix = name[len(prefix):]
+            if not suffix.isdigit():
+                continue
+            month = date(int(suffix[:4]), int(suffix[4:]), 1)
+            if self._next_month(month) <= cutoff.date():
+                _logger.info(f"Dropping expired status log partition {name}")
+                self.env.cr.execute(f"ALTER TABLE {self._table} DETACH PARTITION {name}")
+                self.env.cr.execute(f"DROP TABLE {name}")
+                self._commit_batch()
@@ -50,10 +50,7 @@ class SmartHiveWarningWizard(models.TransientModel):
         })
         
         # Log the warning action
-        self.env['smarthive.client.status'].create({
-            'status_type': 'warning',
-            'status': 'info',
-            'message': 'Local admin updated warning configuration',
-        })
+        self.env['smarthive.client.status'].log_status('warning', 'info',
+            'Local admin updated warning configuration', durable=True)
         
         return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
@@ -7,29 +7,25 @@ import { useService } from "@web/core/utils/hooks";
 class SmartHiveCrmWarningService {
     setup() {
         this.orm = useService("orm");
+        this.rpc = useService("rpc");
         this.action = useService("action");
         this.notification = useService("notification");
     }
 
+    async getWarningData() {
+        // Shared state pushed by the smartHiveWarning service, fetched only if not received yet
+        if (this.warningData === undefined) {
+            this.warningData = await this.rpc('/smarthive_client/warning_data');
+        }
+        return this.warningData;
+    }
+
     async checkAndShowWarnings() {
         try {
             // Check for SmartHive warnings when CRM views are loaded
-            const result = await this.orm.call(
-                'smarthive.client.config',
-                'get_active_config',
-                []
-            );
-
-            if (!result) return;
-
-            // Get warning data
-            const warningData = await this.orm.call(
-                'smarthive.client.config',
-                'get_warning_data',
-                [result.id]
-            );
-
-            if (warningData) {
+            const warningData = await this.getWarningData();
+
+            if (warningData && warningData.show_warning) {
                 if (warningData.block_reason) {
                     // Show block wizard
                     await this.action.doAction({
@@ -43,9 +39,9 @@ class SmartHiveCrmWarningService {
                             default_local_admin_mode: warningData.local_admin_mode || false,
                         },
                     });
-                } else if (warningData.show_warning) {
+                } else {
                     // Check if user has already seen this warning today
-                    const lastWarningKey = `smarthive_warning_${result.id}_${new Date().toDateString()}`;
+                    const lastWarningKey = `smarthive_warning_${warningData.version}_${new Date().toDateString()}`;
                     if (!localStorage.getItem(lastWarningKey)) {
                         // Show warning wizard
                         await this.action.doAction({
@@ -106,12 +102,16 @@ class SmartHiveCrmWarningService {
 
 // Register the service
 registry.category("services").add("smartHiveCrmWarning", {
-    dependencies: ["orm", "action", "notification"],
-    start(env, { orm, action, notification }) {
+    dependencies: ["orm", "rpc", "action", "notification"],
+    start(env, { orm, rpc, action, notification }) {
         const service = new SmartHiveCrmWarningService();
         service.orm = orm;
+        service.rpc = rpc;
         service.action = action;
         service.notification = notification;
+        window.addEventListener("smarthive:warning_data", (event) => {
+            service.warningData = event.detail;
+        });
         return service;
     },
 });
@@ -4,6 +4,9 @@
 
     console.log('SmartHive Immediate Warning System starting...');
 
+    // Last state version seen, sent back so unchanged state is not resent
+    let lastVersion = null;
+
     // Function to make the warning request
     function checkWarnings() {
         console.log('Making warning request...');
@@ -15,7 +18,7 @@
                 'X-Requested-With': 'XMLHttpRequest',
             },
             credentials: 'include',
-            body: JSON.stringify({})
+            body: JSON.stringify({ params: { version: lastVersion } })
         })
             .then(response => {
                 console.log('Response received:', response.status);
@@ -34,6 +37,11 @@
                     console.log('Extracted result:', warningData);
                 }
 
+                if (warningData.not_modified) {
+                    console.log('Warning data not modified');
+                    return;
+                }
+
                 handleWarningData(warningData);
             })
             .catch(error => {
@@ -41,9 +49,17 @@
             });
     }
 
+    function onWarningData(event) {
+        handleWarningData(event.detail);
+    }
+
     function handleWarningData(data) {
         console.log('Processing warning data:', JSON.stringify(data));
 
+        if (data && data.version) {
+            lastVersion = data.version;
+        }
+
         // Remove any existing warnings first
         removeExistingWarnings();
 
@@ -225,11 +241,9 @@
     function init() {
         console.log('Initializing SmartHive warning system...');
 
-        // Check immediately
-        setTimeout(checkWarnings, 500);
-
-        // Check periodically
-        setInterval(checkWarnings, 60000);
+        // Warning data is fetched once by the smartHiveWarning service and
+        // pushed over the bus afterwards, no polling needed here
+        window.addEventListener('smarthive:warning_data', onWarningData);
 
         // Expose for testing
         window.SmartHiveTest = {
@@ -0,0 +1,156 @@
+/** @odoo-module **/
+
+// Cross-tab coordination: one leader tab fetches SmartHive state and shares it
+
+const CHANNEL_NAME = "smarthive_client";
+const LEADER_KEY = "smarthive_client_leader";
+const MESSAGE_KEY = "smarthive_client_message";
+const LEASE_DURATION = 10000;
+const LEASE_RENEWAL = 4000;
+const REQUEST_TIMEOUT = 3000;
+
+export class SmartHiveTabCoordinator {
+    constructor() {
+        this.id = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        this.stateCallbacks = [];
+        this.pendingRequests = [];
+        this.fetcher = null;
+
+        if (window.BroadcastChannel) {
+            this.channel = new BroadcastChannel(CHANNEL_NAME);
+            this.channel.onmessage = (event) => this.onMessage(event.data);
+        } else {
+            // Fallback: messages travel through storage events of other tabs
+            window.addEventListener("storage", (event) => {
+                if (event.key === MESSAGE_KEY && event.newValue) {
+                    this.onMessage(JSON.parse(event.newValue));
+                }
+            });
+        }
+
+        this.claimLeadership();
+        this.renewalInterval = setInterval(() => this.claimLeadership(), LEASE_RENEWAL);
+        window.addEventListener("pagehide", () => this.resign());
+    }
+
+    // Leadership
+
+    readLease() {
+        try {
+            return JSON.parse(localStorage.getItem(LEADER_KEY) || "null");
+        } catch {
+            return null;
+        }
+    }
+
+    claimLeadership() {
+        try {
+            const lease = this.readLease();
+            if (!lease || lease.id === this.id || lease.expires < Date.now()) {
+                localStorage.setItem(LEADER_KEY, JSON.stringify({
+                    id: this.id,
+                    expires: Date.now() + LEASE_DURATION,
+                }));
+            }
+        } catch {
+            // No storage available: every tab fetches for itself
+            this.storageUnavailable = true;
+        }
+    }
+
+    get isLeader() {
+        if (this.storageUnavailable) {
+            return true;
+        }
+        const lease = this.readLease();
+        return Boolean(lease && lease.id === this.id && lease.expires >= Date.now());
+    }
+
+    resign() {
+        clearInterval(this.renewalInterval);
+        if (this.isLeader && !this.storageUnavailable) {
+            localStorage.removeItem(LEADER_KEY);
+            // Let the remaining tabs elect a new leader right away
+            this.post({ type: "resign", from: this.id });
+        }
+    }
+
+    // Messaging
+
+    post(message) {
+        if (this.channel) {
+            this.channel.postMessage(message);
+        } else {
+            try {
+                localStorage.setItem(MESSAGE_KEY, JSON.stringify({ ...message, nonce: Math.random() }));
+            } catch {
+                // Nothing to share with
+            }
+        }
+    }
+
+    onMessage(message) {
+        if (!message || message.from === this.id) {
+            return;
+        }
+        if (message.type === "resign") {
+            this.claimLeadership();
+        } else if (message.type === "request" && this.isLeader && this.fetcher) {
+            // The requesting tab may hold an older version than ours: share the full state
+            this.fetchAndShare(true);
+        } else if (message.type === "state") {
+            if (this.pendingRequests.length) {
+                // The tab waiting for this state applies it itself
+                this.resolvePending(message.data);
+            } else {
+                this.stateCallbacks.forEach((callback) => callback(message.data));
+            }
+        }
+    }
+
+    resolvePending(data) {
+        const pending = this.pendingRequests;
+        this.pendingRequests = [];
+        pending.forEach(({ resolve, timeout }) => {
+            clearTimeout(timeout);
+            resolve(data);
+        });
+    }
+
+    // State
+
+    setFetcher(fetcher) {
+        this.fetcher = fetcher;
+    }
+
+    onState(callback) {
+        this.stateCallbacks.push(callback);
+    }
+
+    async fetchAndShare(full = false) {
+        const data = await this.fetcher(full);
+        if (data && !data.not_modified) {
+            this.post({ type: "state", from: this.id, data });
+        }
+        return data;
+    }
+
+    /**
+     * Get fresh state: the leader fetches it, other tabs ask the leader and
+     * only fetch themselves when no answer comes back in time.
+     */
+    requestState() {
+        if (this.isLeader) {
+            return this.fetchAndShare();
+        }
+        return new Promise((resolve) => {
+            const timeout = setTimeout(() => {
+                this.pendingRequests = this.pendingRequests.filter((request) => request.resolve !== resolve);
+                this.claimLeadership();
+                resolve(this.fetchAndShare(true));
+            }, REQUEST_TIMEOUT);
+            this.pendingRequests.push({ resolve, timeout });
+            this.post({ type: "request", from: this.id });
+        });
+    }
+}
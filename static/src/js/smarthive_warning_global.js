@@ -6,6 +6,9 @@
 
     console.log('SmartHive Global Warning System Loading...');
 
+    // Last state version seen, sent back so unchanged state is not resent
+    let lastVersion = null;
+
     // Function to check warnings
     async function checkSmartHiveWarnings() {
         try {
@@ -18,7 +21,7 @@
                     'X-Requested-With': 'XMLHttpRequest',
                 },
                 credentials: 'include',
-                body: JSON.stringify({})
+                body: JSON.stringify({ params: { version: lastVersion } })
             });
 
             if (!response.ok) {
@@ -29,6 +32,24 @@
             const data = await response.json();
             console.log('Warning data received:', data);
 
+            // Handle Odoo JSON-RPC response format
+            applyWarningData(data.result || data);
+        } catch (error) {
+            console.error('SmartHive warning check failed:', error);
+        }
+    }
+
+    function onWarningData(event) {
+        applyWarningData(event.detail);
+    }
+
+    function applyWarningData(data) {
+        try {
+            if (data.not_modified) {
+                return;
+            }
+            lastVersion = data.version || null;
+
             // Remove existing banners first
             removeExistingWarnings();
 
@@ -157,11 +178,9 @@
     function initializeWarningSystem() {
         console.log('Initializing SmartHive warning system...');
 
-        // Initial check
-        setTimeout(checkSmartHiveWarnings, 1000);
-
-        // Periodic checks every minute
-        setInterval(checkSmartHiveWarnings, 60000);
+        // Warning data is fetched once by the smartHiveWarning service and
+        // pushed over the bus afterwards, no polling needed here
+        window.addEventListener('smarthive:warning_data', onWarningData);
 
         console.log('SmartHive warning system initialized');
     }
@@ -173,9 +192,6 @@
         initializeWarningSystem();
     }
 
-    // Also try after a short delay to catch late-loading pages
-    setTimeout(initializeWarningSystem, 2000);
-
     // Expose for manual testing
     window.SmartHiveWarnings = {
         check: checkSmartHiveWarnings,
@@ -1,8 +1,10 @@
 /** @odoo-module **/
 
-import { Component, onWillStart, useState, onMounted } from "@odoo/owl";
+import { Component, onWillStart, useState } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { session } from "@web/session";
+import { SmartHiveTabCoordinator } from "./smarthive_tab_coordinator";
 
 class SmartHiveWarningBanner extends Component {
     setup() {
@@ -19,13 +21,6 @@ class SmartHiveWarningBanner extends Component {
         onWillStart(async () => {
             await this.loadWarningData();
         });
-
-        onMounted(() => {
-            // Check for warnings periodically
-            this.warningInterval = setInterval(() => {
-                this.loadWarningData();
-            }, 60000); // Check every minute
-        });
     }
 
     async loadWarningData() {
@@ -119,9 +114,6 @@ class SmartHiveWarningBanner extends Component {
     }
 
     willUnmount() {
-        if (this.warningInterval) {
-            clearInterval(this.warningInterval);
-        }
         this.hideWarningBanner();
     }
 }
@@ -130,42 +122,68 @@ SmartHiveWarningBanner.template = "smarthive_client.WarningBanner";
 
 // Register as a service that can be used throughout the application
 const smartHiveWarningService = {
-    dependencies: ["rpc", "action"],
+    dependencies: ["rpc", "action", "bus_service"],
 
-    start(env, { rpc, action }) {
+    start(env, { rpc, action, bus_service }) {
         let warningBanner = null;
+        let lastVersion = null;
+
+        // Apply warning data and share it with the standalone warning scripts
+        const applyWarningData = async (result) => {
+            if (result.not_modified) {
+                return;
+            }
+            lastVersion = result.version || null;
+            window.dispatchEvent(new CustomEvent("smarthive:warning_data", { detail: result }));
+
+            if (result.show_warning) {
+                // Create warning banner instance if not exists
+                if (!warningBanner) {
+                    warningBanner = new SmartHiveWarningBanner();
+                    warningBanner.setup();
+                }
 
-        // Check for warnings on app start
+                // Show appropriate warning
+                if (result.block_reason) {
+                    // Show block modal
+                    await action.doAction({
+                        type: 'ir.actions.act_window',
+                        name: 'System Access Restricted',
+                        res_model: 'smarthive.block.wizard',
+                        view_mode: 'form',
+                        target: 'new',
+                        context: {
+                            default_block_reason: result.block_reason,
+                            default_local_admin_mode: result.local_admin_mode || false,
+                        },
+                    });
+                } else {
+                    // Show warning banner
+                    showSimpleWarningBanner(result);
+                }
+            } else {
+                // Warning was lifted, drop the banner
+                const existingBanner = document.querySelector('.smarthive-warning-banner');
+                if (existingBanner) {
+                    existingBanner.remove();
+                }
+            }
+        };
+
+        // Only the leader tab fetches warning data, the other tabs receive its result
+        const coordinator = new SmartHiveTabCoordinator();
+        coordinator.setFetcher((full) => rpc('/smarthive_client/warning_data', { version: full ? null : lastVersion }));
+        coordinator.onState((result) => {
+            applyWarningData(result).catch((error) => {
+                console.error("SmartHive shared warning update failed:", error);
+            });
+        });
+
+        // Fetch warning data from the server
         const checkWarnings = async () => {
             try {
-                const result = await rpc('/smarthive_client/warning_data');
-
-                if (result.show_warning) {
-                    // Create warning banner instance if not exists
-                    if (!warningBanner) {
-                        warningBanner = new SmartHiveWarningBanner();
-                        warningBanner.setup();
-                    }
-
-                    // Show appropriate warning
-                    if (result.block_reason) {
-                        // Show block modal
-                        await action.doAction({
-                            type: 'ir.actions.act_window',
-                            name: 'System Access Restricted',
-                            res_model: 'smarthive.block.wizard',
-                            view_mode: 'form',
-                            target: 'new',
-                            context: {
-                                default_block_reason: result.block_reason,
-                                default_local_admin_mode: result.local_admin_mode || false,
-                            },
-                        });
-                    } else {
-                        // Show warning banner
-                        showSimpleWarningBanner(result);
-                    }
-                }
+                const result = await coordinator.requestState();
+                await applyWarningData(result);
             } catch (error) {
                 console.error("SmartHive warning check failed:", error);
             }
@@ -209,11 +227,27 @@ const smartHiveWarningService = {
             }
         }
 
-        // Initial check
-        checkWarnings();
+        // Initial state comes with the session, later changes are pushed over the bus
+        if (session.smarthive_warning) {
+            applyWarningData(session.smarthive_warning).catch((error) => {
+                console.error("SmartHive warning display failed:", error);
+            });
+        } else {
+            checkWarnings();
+        }
 
-        // Periodic checks
-        setInterval(checkWarnings, 60000);
+        bus_service.subscribe("smarthive_client/state", (payload) => {
+            applyWarningData(payload).catch((error) => {
+                console.error("SmartHive warning update failed:", error);
+            });
+        });
+        // Notifications may have been missed while disconnected, the leader catches up
+        bus_service.addEventListener("reconnect", () => {
+            if (coordinator.isLeader) {
+                checkWarnings();
+            }
+        });
+        bus_service.start();
 
         return {
             checkWarnings,
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from . import test_access_enforcement
+from . import test_api_credentials
+from . import test_block_dispatch
+from . import test_crm_lead_benchmark
+from . import test_commands
+from . import test_status_log_buffer
+from . import test_status_log_export
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import time
+
+from odoo.exceptions import AccessDenied
+from odoo.tests import new_test_user, tagged, TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+# Allowed wall time of the enforced check relative to a model without enforcement
+MAX_TIME_RATIO = 1.2
+TIME_TOLERANCE = 0.01
+
+
+class AccessEnforcementCase(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['smarthive.client.config'].create({
+            'name': 'Enforcement Test Config',
+            'server_url': 'https://smarthive.example.com',
+            'client_id': 'enforcement-test',
+            'api_key': 'enforcement-test-key',
+            'local_admin_mode': True,
+        })
+        cls.user = new_test_user(cls.env, login='smarthive_enforcement_user', groups='base.group_user')
+        cls.admin = new_test_user(cls.env, login='smarthive_enforcement_admin', groups='base.group_system')
+
+
+@tagged('post_install', '-at_install')
+class TestAccessEnforcement(AccessEnforcementCase):
+
+    def test_check_access_rights_without_block_runs_no_query(self):
+        users = self.env['res.users'].with_user(self.user)
+        users.check_access_rights('read')
+        with self.assertQueryCount(0):
+            for _i in range(100):
+                users.check_access_rights('read')
+
+    def test_rewriting_same_state_keeps_cache(self):
+        users = self.env['res.users'].with_user(self.user)
+        users.check_access_rights('read')
+        self.config.write({'is_blocked': False, 'show_warning': False, 'payment_status': self.config.payment_status})
+        with self.assertQueryCount(0):
+            users.check_access_rights('read')
+
+    def test_blocked_user_is_denied(self):
+        self.config.write({'is_blocked': True, 'block_reason': 'Unpaid invoice'})
+        with self.assertRaises(AccessDenied):
+            self.env['res.users'].with_user(self.user).check_access_rights('read')
+        self.assertFalse(self.env['res.users'].with_user(self.user).check_access_rights('read', raise_exception=False))
+
+    def test_blocked_admin_is_exempt(self):
+        self.config.write({'is_blocked': True, 'block_reason': 'Unpaid invoice'})
+        self.assertTrue(self.env['res.users'].with_user(self.admin).check_access_rights('read'))
+
+    def test_blocked_checks_run_no_query(self):
+        self.config.write({'is_blocked': True, 'block_reason': 'Unpaid invoice'})
+        users = self.env['res.users'].with_user(self.user)
+        admins = self.env['res.users'].with_user(self.admin)
+        users.check_access_rights('read', raise_exception=False)
+        admins.check_access_rights('read')
+        with self.assertQueryCount(0):
+            for _i in range(100):
+                users.check_access_rights('read', raise_exception=False)
+                admins.check_access_rights('read')
+
+    def test_unblock_restores_access(self):
+        self.config.write({'is_blocked': True})
+        self.config.write({'is_blocked': False})
+        self.assertTrue(self.env['res.users'].with_user(self.user).check_access_rights('read'))
+
+
+@tagged('smarthive_benchmark', '-standard', 'post_install', '-at_install')
+class TestAccessEnforcementBenchmark(AccessEnforcementCase):
+    """Wall-clock check of the override, run with --test-tags smarthive_benchmark"""
+
+    def test_check_access_rights_overhead(self):
+        """Benchmark the override against a model without enforcement"""
+        iterations = 20000
+        users = self.env['res.users'].with_user(self.user)
+        partners = self.env['res.partner'].with_user(self.user)
+        users.check_access_rights('read')
+        partners.check_access_rights('read')
+        
+        started = time.perf_counter()
+        for _i in range(iterations):
+            partners.check_access_rights('read')
+        baseline = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        for _i in range(iterations):
+            users.check_access_rights('read')
+        enforced = time.perf_counter() - started
+        
+        _logger.info("SmartHive check_access_rights benchmark:\n%s", json.dumps({
+            'iterations': iterations,
+            'baseline': round(baseline, 6),
+            'enforced': round(enforced, 6),
+            'delta_per_call_us': round((enforced - baseline) / iterations * 1e6, 3),
+        }, indent=2, sort_keys=True))
+        self.assertLessEqual(enforced, baseline * MAX_TIME_RATIO + TIME_TOLERANCE)
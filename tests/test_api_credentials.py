@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+from odoo.tests import tagged, TransactionCase
+
+
+@tagged('post_install', '-at_install')
+class TestApiCredentials(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Config = cls.env['smarthive.client.config']
+        cls.config = cls.Config.create({
+            'name': 'Credentials Test Config',
+            'server_url': 'https://smarthive.example.com',
+            'client_id': 'credentials-test',
+            'api_key': 'credentials-test-key',
+        })
+
+    def test_cached_lookup_runs_no_query(self):
+        self.assertEqual(self.Config._lookup_api_credentials('credentials-test')[0], self.config.id)
+        with self.assertQueryCount(0):
+            self.Config._lookup_api_credentials('credentials-test')
+
+    def test_rotated_key_is_rejected(self):
+        self.assertEqual(self.Config._authenticate_api_key('credentials-test', 'credentials-test-key'), self.config)
+        self.config.api_key = 'rotated-key'
+        self.assertFalse(self.Config._authenticate_api_key('credentials-test', 'credentials-test-key'))
+        self.assertEqual(self.Config._authenticate_api_key('credentials-test', 'rotated-key'), self.config)
+
+    def test_archived_config_is_rejected(self):
+        self.assertTrue(self.Config._authenticate_api_key('credentials-test', 'credentials-test-key'))
+        self.config.active = False
+        self.assertFalse(self.Config._authenticate_api_key('credentials-test', 'credentials-test-key'))
+
+    def test_change_signalled_by_another_worker_is_rejected(self):
+        self.assertTrue(self.Config._authenticate_api_key('credentials-test', 'credentials-test-key'))
+        # Another worker rotated the key: only the shared cache sequence moved here
+        self.env.cr.execute(
+            "UPDATE smarthive_client_config SET api_key_hash = %s WHERE id = %s",
+            [self.Config._hash_api_key('rotated-key'), self.config.id])
+        self.config.invalidate_recordset(['api_key_hash'])
+        sequences = dict(self.env.registry.cache_sequences)
+        sequences['default'] = (sequences.get('default') or 0) + 1
+        with patch.object(self.env.registry, 'cache_sequences', sequences):
+            self.assertFalse(self.Config._authenticate_api_key('credentials-test', 'credentials-test-key'))
+            self.assertEqual(self.Config._authenticate_api_key('credentials-test', 'rotated-key'), self.config)
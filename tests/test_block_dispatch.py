@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import json
+from unittest.mock import patch
+
+from odoo.tests import HttpCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBlockDispatch(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['smarthive.client.config'].create({
+            'name': 'Dispatch Test Config',
+            'server_url': 'https://smarthive.example.com',
+            'client_id': 'dispatch-test',
+            'api_key': 'dispatch-test-key',
+            'local_admin_mode': True,
+        })
+        cls.user = new_test_user(
+            cls.env, login='smarthive_dispatch_user', groups='base.group_user,base.group_partner_manager')
+        cls.admin = new_test_user(cls.env, login='smarthive_dispatch_admin', groups='base.group_system')
+        cls.partner = cls.env['res.partner'].create({'name': 'Dispatch Partner'})
+
+    def _jsonrpc(self, route, params):
+        response = self.url_open(route, data=json.dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'id': 0,
+            'params': params,
+        }), headers={'Content-Type': 'application/json'})
+        return response.json()
+
+    def _call_kw(self, method, args, kwargs=None):
+        return self._jsonrpc(f'/web/dataset/call_kw/res.partner/{method}', {
+            'model': 'res.partner',
+            'method': method,
+            'args': args,
+            'kwargs': kwargs or {},
+        })
+
+    def _write_partner(self):
+        return self._call_kw('write', [[self.partner.id], {'name': 'Renamed Partner'}])
+
+    def assertRejected(self, answer):
+        self.assertEqual(answer.get('error', {}).get('data', {}).get('name'), 'odoo.exceptions.AccessError')
+
+    def _block(self):
+        self.config.write({'is_blocked': True, 'block_reason': 'Unpaid invoice'})
+
+    def test_blocked_user_write_is_rejected(self):
+        self._block()
+        self.authenticate('smarthive_dispatch_user', 'smarthive_dispatch_user')
+        self.assertRejected(self._write_partner())
+
+    def test_blocked_user_json_route_is_rejected(self):
+        self._block()
+        self.authenticate('smarthive_dispatch_user', 'smarthive_dispatch_user')
+        self.assertRejected(self._jsonrpc('/web/dataset/resequence', {
+            'model': 'res.partner',
+            'ids': [self.partner.id],
+        }))
+
+    def test_blocked_user_reads_pass(self):
+        self._block()
+        self.authenticate('smarthive_dispatch_user', 'smarthive_dispatch_user')
+        answer = self._call_kw('web_search_read', [], {
+            'domain': [('id', '=', self.partner.id)],
+            'specification': {'name': {}},
+        })
+        self.assertEqual(answer['result']['records'][0]['name'], 'Dispatch Partner')
+
+    def test_blocked_user_allowlisted_model_passes(self):
+        self.env['ir.config_parameter'].sudo().set_param('smarthive_client.block_allowed_models', 'res.partner')
+        self._block()
+        self.authenticate('smarthive_dispatch_user', 'smarthive_dispatch_user')
+        self.assertIs(self._write_partner().get('result'), True)
+
+    def test_blocked_admin_is_unaffected(self):
+        self._block()
+        self.authenticate('smarthive_dispatch_admin', 'smarthive_dispatch_admin')
+        self.assertIs(self._write_partner().get('result'), True)
+        self.assertNotIn('error', self._jsonrpc('/web/dataset/resequence', {
+            'model': 'res.partner',
+            'ids': [self.partner.id],
+        }))
+
+    def test_idle_dispatch_runs_no_extra_query(self):
+        self.authenticate('smarthive_dispatch_user', 'smarthive_dispatch_user')
+        IrHttp = type(self.env['ir.http'])
+
+        def count_queries():
+            # Warm the caches first, then measure a second identical request
+            self._write_partner()
+            queries = self.cr.sql_log_count
+            self._write_partner()
+            return self.cr.sql_log_count - queries
+
+        enforced = count_queries()
+        with patch.object(IrHttp, '_smarthive_check_request', classmethod(lambda cls: None)):
+            baseline = count_queries()
+        self.assertEqual(enforced, baseline)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from odoo.exceptions import ValidationError
+from odoo.tests import tagged, TransactionCase
+
+
+@tagged('post_install', '-at_install')
+class TestCommands(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['smarthive.client.config'].create({
+            'name': 'Commands Test Config',
+            'server_url': 'https://smarthive.example.com',
+            'client_id': 'commands-test',
+            'api_key': 'commands-test-key',
+        })
+
+    def test_batch_applied_in_order_with_one_log_entry(self):
+        Status = self.env['smarthive.client.status']
+        entries = Status.search_count([])
+        version = self.config.state_version
+        results = self.config._apply_commands([
+            {'key': 'k1', 'type': 'block', 'block_reason': 'Overdue'},
+            {'key': 'k2', 'type': 'warning', 'show_warning': True, 'warning_message': 'Pay now'},
+            {'key': 'k3', 'type': 'unblock'},
+        ])
+        self.assertEqual([result['status'] for result in results], ['applied'] * 3)
+        self.assertFalse(self.config.is_blocked)
+        self.assertTrue(self.config.show_warning)
+        self.assertEqual(self.config.warning_message, 'Pay now')
+        self.assertEqual(self.config.state_version, version + 1)
+        self.assertEqual(Status.search_count([]), entries + 1)
+
+    def test_duplicate_keys_are_skipped(self):
+        self.config._apply_commands([{'key': 'block-1', 'type': 'block', 'block_reason': 'Overdue'}])
+        self.config._apply_commands([{'key': 'unblock-1', 'type': 'unblock'}])
+        results = self.config._apply_commands([
+            {'key': 'block-1', 'type': 'block', 'block_reason': 'Overdue'},
+            {'key': 'unblock-1', 'type': 'unblock'},
+        ])
+        self.assertEqual([result['status'] for result in results], ['duplicate', 'duplicate'])
+        self.assertFalse(self.config.is_blocked)
+        self.assertEqual(json.loads(self.config.processed_command_keys), ['block-1', 'unblock-1'])
+
+    def test_unchanged_state_keeps_version(self):
+        self.config._apply_commands([{'key': 'block-1', 'type': 'block', 'block_reason': 'Overdue'}])
+        version = self.config.state_version
+        self.config._apply_commands([{'key': 'block-2', 'type': 'block', 'block_reason': 'Overdue'}])
+        self.assertEqual(self.config.state_version, version)
+
+    def test_invalid_command_rejects_batch(self):
+        with self.assertRaises(ValidationError):
+            self.config._apply_commands([
+                {'key': 'k1', 'type': 'block'},
+                {'key': 'k2', 'type': 'reboot'},
+            ])
+        self.assertFalse(self.config.is_blocked)
+        self.assertFalse(self.config.processed_command_keys)
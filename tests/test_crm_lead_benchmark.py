@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import time
+
+from odoo.exceptions import UserError
+from odoo.tests import new_test_user, tagged, TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+# Leads per bulk operation
+BATCH_SIZE = 200
+
+# Extra queries a state may add over the idle state, per operation
+MAX_EXTRA_QUERIES = {
+    'create': 0,
+    'write': 0,
+    'search_read': 0,
+    'check_access': 0,
+}
+
+# Idle scenario each scenario is compared with, run as the same user
+# (blocked users are rejected before any work and are not compared)
+BASELINES = {
+    'warning': 'idle',
+    'blocked_admin': 'idle_admin',
+}
+
+# Allowed wall time of an operation relative to the idle state
+MAX_TIME_RATIO = 1.5
+TIME_TOLERANCE = 0.05
+
+# Hard ceiling on queries of the SmartHive access check itself
+MAX_CHECK_ACCESS_QUERIES = 0
+
+
+@tagged('smarthive_benchmark', '-standard', 'post_install', '-at_install')
+class TestCrmLeadBenchmark(TransactionCase):
+    """Benchmark the ORM overhead the addon adds to crm.lead
+
+    Run with ``--test-tags smarthive_benchmark``. Results are logged as JSON
+    and written to the file named by SMARTHIVE_BENCHMARK_OUTPUT when set.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['smarthive.client.config'].create({
+            'name': 'Benchmark Config',
+            'server_url': 'https://smarthive.example.com',
+            'client_id': 'benchmark',
+            'api_key': 'benchmark-key',
+            'local_admin_mode': True,
+        })
+        cls.admin = new_test_user(
+            cls.env, login='smarthive_bench_admin',
+            groups='base.group_system,sales_team.group_sale_manager')
+        cls.salesman = new_test_user(
+            cls.env, login='smarthive_bench_salesman',
+            groups='base.group_user,sales_team.group_sale_salesman_all_leads')
+
+    def _measure(self, func):
+        """Run ``func`` once warm and return its query count and wall time"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.cr.sql_log_count
+        started = time.perf_counter()
+        try:
+            func()
+        except UserError:
+            pass
+        self.env.flush_all()
+        return {
+            'queries': self.cr.sql_log_count - queries,
+            'time': round(time.perf_counter() - started, 6),
+        }
+
+    def _run_operations(self, user):
+        Lead = self.env['crm.lead'].with_user(user)
+        leads = self.env['crm.lead'].create([
+            {'name': f'Benchmark Lead {i}', 'user_id': user.id} for i in range(BATCH_SIZE)
+        ]).with_user(user)
+        vals_list = [{'name': f'Benchmark New Lead {i}'} for i in range(BATCH_SIZE)]
+        domain = [('id', 'in', leads.ids)]
+
+        def check_access():
+            for _i in range(BATCH_SIZE):
+                Lead._check_smarthive_access()
+
+        operations = {
+            'create': lambda: Lead.create(vals_list),
+            'write': lambda: leads.write({'description': 'Benchmark'}),
+            'search_read': lambda: Lead.search_read(domain, ['name', 'stage_id', 'user_id']),
+            'check_access': check_access,
+        }
+        results = {}
+        for name, operation in operations.items():
+            # Warm the registry caches cleared by the state change first
+            self._measure(operation)
+            results[name] = self._measure(operation)
+        return results
+
+    def test_crm_lead_overhead(self):
+        scenarios = {}
+        scenarios['idle'] = self._run_operations(self.salesman)
+        scenarios['idle_admin'] = self._run_operations(self.admin)
+
+        self.config.write({'show_warning': True, 'warning_message': 'Benchmark warning'})
+        scenarios['warning'] = self._run_operations(self.salesman)
+
+        self.config.write({'show_warning': False, 'is_blocked': True, 'block_reason': 'Benchmark block'})
+        scenarios['blocked_admin'] = self._run_operations(self.admin)
+        scenarios['blocked_user'] = self._run_operations(self.salesman)
+
+        report = json.dumps({
+            'batch_size': BATCH_SIZE,
+            'scenarios': scenarios,
+        }, indent=2, sort_keys=True)
+        _logger.info("SmartHive crm.lead benchmark:\n%s", report)
+        output = os.environ.get('SMARTHIVE_BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as f:
+                f.write(report)
+
+        for scenario, results in scenarios.items():
+            self.assertLessEqual(
+                results['check_access']['queries'], MAX_CHECK_ACCESS_QUERIES,
+                f"{scenario}: _check_smarthive_access runs queries")
+            if scenario not in BASELINES:
+                continue
+            idle = scenarios[BASELINES[scenario]]
+            for operation, result in results.items():
+                self.assertLessEqual(
+                    result['queries'], idle[operation]['queries'] + MAX_EXTRA_QUERIES[operation],
+                    f"{scenario}: {operation} runs more queries than when idle")
+                self.assertLessEqual(
+                    result['time'], idle[operation]['time'] * MAX_TIME_RATIO + TIME_TOLERANCE,
+                    f"{scenario}: {operation} is slower than when idle")
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import nullcontext
+
+from odoo.tests import tagged, TransactionCase
+
+from ..models import smarthive_client_status
+from ..models.smarthive_client_status import LOG_BUFFER_MAX_AGE, LOG_BUFFER_SIZE
+
+
+@tagged('post_install', '-at_install')
+class TestStatusLogBuffer(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.Status = self.env['smarthive.client.status']
+        # Write flushed entries on the test cursor, so they stay in the test transaction
+        self.patch(type(self.Status), '_log_buffer_cursor', lambda model: nullcontext(self.env.cr))
+        # Entries left by other tests belong to rolled back transactions
+        smarthive_client_status._log_buffer.pop(self.env.cr.dbname, None)
+        self.addCleanup(smarthive_client_status._log_buffer.pop, self.env.cr.dbname, None)
+
+    def _count(self, message):
+        return self.Status.search_count([('message', '=', message)])
+
+    def test_full_buffer_is_flushed(self):
+        for _i in range(LOG_BUFFER_SIZE - 1):
+            self.Status.log_status('heartbeat', 'success', 'Buffered heartbeat')
+        self.assertEqual(self._count('Buffered heartbeat'), 0)
+        self.Status.log_status('heartbeat', 'success', 'Buffered heartbeat')
+        self.assertEqual(self._count('Buffered heartbeat'), LOG_BUFFER_SIZE)
+
+    def test_old_buffer_is_flushed_when_due(self):
+        self.Status.log_status('error', 'error', 'Buffered error')
+        self.assertEqual(self.Status.flush_log_buffer_if_due(), 0)
+        self.assertEqual(self._count('Buffered error'), 0)
+        
+        smarthive_client_status._log_buffer[self.env.cr.dbname]['since'] -= LOG_BUFFER_MAX_AGE
+        self.assertEqual(self.Status.flush_log_buffer_if_due(), 1)
+        self.assertEqual(self._count('Buffered error'), 1)
+
+    def test_durable_entry_written_before_commit(self):
+        self.Status.log_status('system', 'info', 'Durable entry', durable=True)
+        self.env.cr.precommit.run()
+        self.assertEqual(self._count('Durable entry'), 1)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import datetime
+
+from odoo.tests import tagged, TransactionCase
+
+from ..controllers.client_endpoints import _parse_since_date, _stream_status_log
+
+
+@tagged('post_install', '-at_install')
+class TestStatusLogExport(TransactionCase):
+
+    def _export(self, since_date=None, since_id=None, limit=None):
+        chunks = _stream_status_log(self.env.registry, since_date, since_id, limit, False)
+        return [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+
+    def test_resume_from_last_emitted_row(self):
+        Status = self.env['smarthive.client.status']
+        self.env.cr.execute(f"DELETE FROM {Status._table}")
+        # Microsecond dates, two of them equal, so the (create_date, id) keyset is exercised
+        dates = [datetime(2026, 1, 1, 12, 0, 0, microsecond) for microsecond in (1001, 2001, 2001, 3001, 4001)]
+        Status._insert_entries(self.env.cr, [
+            ('system', 'info', f'Entry {index}', None, create_date, self.env.uid)
+            for index, create_date in enumerate(dates)
+        ])
+        
+        rows = self._export(limit=2)
+        exported = list(rows)
+        while rows:
+            last = rows[-1]
+            rows = self._export(_parse_since_date(last['create_date']), last['id'], limit=2)
+            exported += rows
+        self.assertEqual([row['message'] for row in exported], [f'Entry {index}' for index in range(5)])
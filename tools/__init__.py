@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+from . import http_pool
+from . import circuit_breaker
+from . import command_channel
+from . import heartbeat_aggregator
+from . import metrics
+from . import profiling
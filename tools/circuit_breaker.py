@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Consecutive failures opening the circuit
+FAILURE_THRESHOLD = 3
+
+# Seconds an open circuit fails fast before letting a probe through
+OPEN_SECONDS = 60
+
+# Seconds after which a probe that never reported back is given up on
+PROBE_SECONDS = 60
+
+# Latencies kept per server for adaptive timeouts
+LATENCY_WINDOW = 50
+
+# Samples needed before timeouts adapt, and how they are derived
+MIN_SAMPLES = 10
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_MULTIPLIER = 4
+MIN_READ_TIMEOUT = 2.0
+
+
+class CircuitOpenError(Exception):
+    """The server is known to be down, the request was not sent"""
+
+    def __init__(self, base_url, retry_in):
+        super().__init__(f"SmartHive server {base_url} is unavailable, retrying in {int(retry_in)}s")
+        self.retry_in = retry_in
+
+
+def _state_path(base_url):
+    digest = hashlib.sha1(base_url.encode()).hexdigest()
+    return os.path.join(config['data_dir'], 'smarthive_breaker', f'{digest}.json')
+
+
+def _default_state():
+    return {'state': CLOSED, 'failures': 0, 'opened_at': 0.0, 'probe_at': 0.0, 'latencies': []}
+
+
+@contextmanager
+def _locked_state(base_url):
+    """Read the shared state of a server and write back its changes, under a file lock"""
+    path = _state_path(base_url)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_file = open(f'{path}.lock', 'w')
+    except OSError as e:
+        # Without shared storage the breaker stays closed rather than blocking requests
+        _logger.warning(f"Cannot access SmartHive circuit breaker state: {str(e)}")
+        yield _default_state()
+        return
+    with lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            with open(path) as f:
+                state = dict(_default_state(), **json.load(f))
+        except (OSError, ValueError):
+            state = _default_state()
+        original = json.dumps(state, sort_keys=True)
+        yield state
+        if json.dumps(state, sort_keys=True) != original:
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+
+
+def before_request(base_url):
+    """Check whether a request to ``base_url`` may be sent
+
+    Returns the state transition it caused, if any, and raises
+    CircuitOpenError while the circuit is open or another worker probes.
+    """
+    now = time.time()
+    with _locked_state(base_url) as state:
+        if state['state'] == CLOSED:
+            return None
+        if state['state'] == OPEN:
+            retry_in = state['opened_at'] + OPEN_SECONDS - now
+            if retry_in > 0:
+                raise CircuitOpenError(base_url, retry_in)
+            state.update(state=HALF_OPEN, probe_at=now)
+            return (OPEN, HALF_OPEN)
+        # Half-open: a single probe at a time
+        if now - state['probe_at'] < PROBE_SECONDS:
+            raise CircuitOpenError(base_url, state['probe_at'] + PROBE_SECONDS - now)
+        state['probe_at'] = now
+        return None
+
+
+def record_success(base_url, duration):
+    """Record a request that reached the server, returning the transition it caused"""
+    with _locked_state(base_url) as state:
+        state['latencies'] = (state['latencies'] + [round(duration, 4)])[-LATENCY_WINDOW:]
+        state['failures'] = 0
+        if state['state'] != CLOSED:
+            previous = state['state']
+            state.update(state=CLOSED, opened_at=0.0, probe_at=0.0)
+            return (previous, CLOSED)
+    return None
+
+
+def record_failure(base_url):
+    """Record a request that failed to reach the server, returning the transition it caused"""
+    with _locked_state(base_url) as state:
+        state['failures'] += 1
+        if state['state'] == HALF_OPEN or (state['state'] == CLOSED and state['failures'] >= FAILURE_THRESHOLD):
+            previous = state['state']
+            state.update(state=OPEN, opened_at=time.time(), probe_at=0.0)
+            return (previous, OPEN)
+    return None
+
+
+def adaptive_read_timeout(base_url, configured):
+    """Derive the read timeout from observed latencies, never above ``configured``"""
+    try:
+        with open(_state_path(base_url)) as f:
+            latencies = json.load(f).get('latencies') or []
+    except (OSError, ValueError):
+        return configured
+    if len(latencies) < MIN_SAMPLES:
+        return configured
+    ordered = sorted(latencies)
+    index = min(len(ordered) - 1, int(len(ordered) * TIMEOUT_PERCENTILE / 100))
+    return min(configured, max(MIN_READ_TIMEOUT, ordered[index] * TIMEOUT_MULTIPLIER))
+
+
+def breaker_state(base_url):
+    """Get the shared breaker state of a server"""
+    try:
+        with open(_state_path(base_url)) as f:
+            return dict(_default_state(), **json.load(f))
+    except (OSError, ValueError):
+        return _default_state()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+from . import http_pool
+
+_logger = logging.getLogger(__name__)
+
+# Seconds the server may hold a poll open before answering without commands
+POLL_TIMEOUT = 50
+
+# Extra read time allowed on top of the poll timeout
+POLL_READ_MARGIN = 10
+
+_lock = threading.Lock()
+_channels = {}
+
+
+class CommandChannel(threading.Thread):
+    """Hold a long-poll request open to the server and apply commands as they arrive
+
+    Runs on its own daemon thread and only opens a database cursor to read the
+    configuration and to apply received commands, never while waiting.
+    """
+
+    def __init__(self, dbname, config_id, lock_file):
+        super().__init__(name=f'smarthive_channel_{dbname}_{config_id}', daemon=True)
+        self.dbname = dbname
+        self.config_id = config_id
+        self.lock_file = lock_file
+        self.stop_event = threading.Event()
+        self.cursor = None
+
+    def _read_config(self):
+        """Get the connection settings, or None when the channel should stop"""
+        registry = Registry(self.dbname).check_signaling()
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            channel_config = env['smarthive.client.config'].browse(self.config_id).exists()
+            if not (channel_config and channel_config.active and channel_config.command_channel
+                    and not channel_config.local_admin_mode and channel_config.server_url):
+                return None
+            return {
+                'base_url': channel_config.server_url.rstrip('/'),
+                'headers': channel_config._get_api_headers(),
+                'connect_timeout': channel_config.connect_timeout or 5,
+            }
+
+    def _poll(self, settings):
+        response = http_pool.send(
+            settings['base_url'], 'POST', f"{settings['base_url']}/smarthive/api/client/commands/poll",
+            headers=settings['headers'],
+            data=json.dumps({'cursor': self.cursor, 'timeout': POLL_TIMEOUT}),
+            connect_timeout=settings['connect_timeout'],
+            read_timeout=POLL_TIMEOUT + POLL_READ_MARGIN,
+        )
+        response.raise_for_status()
+        result = response.json()
+        if not result.get('success'):
+            raise ValueError(result.get('error') or 'Command poll refused by server')
+        return result
+
+    def _apply(self, commands):
+        """Apply received commands and signal the cache invalidations to the other workers"""
+        registry = Registry(self.dbname).check_signaling()
+        try:
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['smarthive.client.config'].browse(self.config_id)._apply_commands(commands)
+        except Exception:
+            registry.reset_changes()
+            raise
+        registry.signal_changes()
+
+    def run(self):
+        threading.current_thread().dbname = self.dbname
+        _logger.info(f"SmartHive command channel started for config {self.config_id}")
+        attempt = 0
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    settings = self._read_config()
+                    if not settings:
+                        break
+                    result = self._poll(settings)
+                    if result.get('commands'):
+                        self._apply(result['commands'])
+                    self.cursor = result.get('cursor', self.cursor)
+                    attempt = 0
+                except Exception as e:
+                    attempt += 1
+                    delay = http_pool.backoff_delay(attempt)
+                    _logger.warning(f"SmartHive command channel error, reconnecting in {delay:.1f}s: {str(e)}")
+                    self.stop_event.wait(delay)
+        finally:
+            with _lock:
+                _channels.pop((self.dbname, self.config_id), None)
+            self.lock_file.close()
+            _logger.info(f"SmartHive command channel stopped for config {self.config_id}")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def _acquire_lease(dbname, config_id):
+    """Get the file lock making this process the only subscriber of a configuration
+
+    The lock is released by the operating system when the process exits.
+    """
+    directory = os.path.join(config['data_dir'], 'smarthive_channel')
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, f'{dbname}-{config_id}.lock'), 'w')
+    if fcntl:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def ensure_running(dbname, config_id):
+    """Start the command channel of a configuration unless a process already runs it"""
+    with _lock:
+        channel = _channels.get((dbname, config_id))
+        if channel and channel.is_alive():
+            return False
+        lock_file = _acquire_lease(dbname, config_id)
+        if not lock_file:
+            return False
+        channel = _channels[(dbname, config_id)] = CommandChannel(dbname, config_id, lock_file)
+    channel.start()
+    return True
+
+
+def stop(dbname, config_id):
+    """Ask the command channel of a configuration in this process to stop"""
+    with _lock:
+        channel = _channels.get((dbname, config_id))
+    if channel:
+        channel.stop()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fleet simulator for load testing the SmartHive client against the stand-in server
+
+Two modes are available:
+
+``clients`` drives N simulated clients straight against the server through
+the addon's pooled HTTP sessions, no database needed:
+
+    python3 tools/fleet_simulator.py clients --clients 500 --heartbeats 20 --latency 0.05
+
+``database`` creates N configurations in one database, runs the heartbeat
+cron over them and removes them again. It needs Odoo on the path and a
+database with the addon installed:
+
+    python3 tools/fleet_simulator.py database -c odoo.conf -d smarthive --configs 200 --rounds 5
+
+Both modes start an in-process stand-in server unless --server-url is
+given, and print a JSON report of throughput, tail latency and, for the
+database mode, cron run durations.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import http_pool, standin_server
+except ImportError:
+    import http_pool
+    import standin_server
+
+_logger = logging.getLogger(__name__)
+
+CLIENT_ID_PREFIX = 'fleet-sim'
+
+
+def _latency_report(latencies, errors, duration):
+    return {
+        'heartbeats': len(latencies),
+        'errors': errors,
+        'duration': round(duration, 3),
+        'throughput': round(len(latencies) / duration, 2) if duration else 0.0,
+        'p50': round(standin_server.percentile(latencies, 50), 4),
+        'p95': round(standin_server.percentile(latencies, 95), 4),
+        'p99': round(standin_server.percentile(latencies, 99), 4),
+        'max': round(max(latencies, default=0.0), 4),
+    }
+
+
+def simulate_clients(server_url, clients, heartbeats, concurrency, interval, api_key, timeout):
+    """Send ``heartbeats`` heartbeats for each of ``clients`` simulated clients"""
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def run_client(index):
+        client_id = f'{CLIENT_ID_PREFIX}-{index}'
+        headers = {
+            'Content-Type': 'application/json',
+            'X-SmartHive-API-Key': api_key,
+            'X-SmartHive-Client-ID': client_id,
+        }
+        fingerprint = None
+        for _i in range(heartbeats):
+            data = {'capabilities': [standin_server.HEARTBEAT_DELTA_CAPABILITY], 'users_count': 1}
+            if fingerprint:
+                data.update(delta=True, state_fingerprint=fingerprint)
+            started = time.monotonic()
+            try:
+                response = http_pool.send(
+                    server_url, 'POST', f'{server_url}{standin_server.API_PREFIX}client/heartbeat',
+                    headers=headers, data=json.dumps(data), read_timeout=timeout,
+                )
+                response.raise_for_status()
+                fingerprint = response.json().get('state_fingerprint')
+            except Exception as e:
+                _logger.debug("Simulated client %s heartbeat failed: %s", client_id, e)
+                with lock:
+                    errors[0] += 1
+            else:
+                with lock:
+                    latencies.append(time.monotonic() - started)
+            if interval:
+                time.sleep(interval)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fleet_sim') as executor:
+        list(executor.map(run_client, range(clients)))
+    return _latency_report(latencies, errors[0], time.monotonic() - started)
+
+
+def simulate_database(server_url, database, config_file, configs, rounds, concurrency, api_key):
+    """Run the heartbeat cron over ``configs`` temporary configurations of ``database``"""
+    import odoo
+    from odoo import api, SUPERUSER_ID
+
+    if config_file:
+        odoo.tools.config.parse_config(['-c', config_file])
+    registry = odoo.modules.registry.Registry(database)
+
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        created = env['smarthive.client.config'].create([{
+            'name': f'Fleet Simulator {index}',
+            'server_url': server_url,
+            'client_id': f'{CLIENT_ID_PREFIX}-{index}',
+            'api_key': api_key,
+        } for index in range(configs)])
+        config_ids = created.ids
+        params = env['ir.config_parameter']
+        previous_concurrency = params.get_param('smarthive_client.heartbeat_concurrency')
+        params.set_param('smarthive_client.heartbeat_concurrency', concurrency)
+        cr.commit()
+
+    durations = []
+    try:
+        for _round in range(rounds):
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                # Make every simulated configuration due again
+                env['smarthive.client.config'].browse(config_ids).write({'next_heartbeat_at': False})
+                cr.commit()
+                started = time.monotonic()
+                env['smarthive.client.config'].cron_heartbeat()
+                cr.commit()
+                durations.append(time.monotonic() - started)
+    finally:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['smarthive.client.config'].browse(config_ids).unlink()
+            env['ir.config_parameter'].set_param(
+                'smarthive_client.heartbeat_concurrency', previous_concurrency or False)
+            cr.commit()
+
+    return {
+        'configs': configs,
+        'rounds': rounds,
+        'concurrency': concurrency,
+        'cron_durations': [round(duration, 3) for duration in durations],
+        'cron_max': round(max(durations, default=0.0), 3),
+        'heartbeats_per_second': round(configs * rounds / sum(durations), 2) if sum(durations) else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartHive client fleet simulator")
+    parser.add_argument('--server-url', help="Use a running server instead of an in-process stand-in")
+    parser.add_argument('--key', default='fleet-sim-key', help="API key sent by the simulated clients")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    standin_server.add_server_arguments(parser)
+    # Let the system pick a free port for the in-process stand-in
+    parser.set_defaults(port=0)
+    modes = parser.add_subparsers(dest='mode', required=True)
+
+    clients = modes.add_parser('clients', help="Simulate clients without a database")
+    clients.add_argument('--clients', type=int, default=100)
+    clients.add_argument('--heartbeats', type=int, default=10, help="Heartbeats per client")
+    clients.add_argument('--concurrency', type=int, default=20)
+    clients.add_argument('--interval', type=float, default=0.0, help="Pause between heartbeats of a client")
+    clients.add_argument('--timeout', type=float, default=30.0)
+
+    database = modes.add_parser('database', help="Simulate configurations in one database")
+    database.add_argument('-d', '--database', required=True)
+    database.add_argument('-c', '--config', help="Odoo configuration file")
+    database.add_argument('--configs', type=int, default=100)
+    database.add_argument('--rounds', type=int, default=3, help="Heartbeat cron runs")
+    database.add_argument('--concurrency', type=int, default=8, help="Heartbeat cron concurrency")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    server = None
+    server_url = args.server_url
+    if not server_url:
+        server = standin_server.server_from_arguments(args).start()
+        server_url = server.url
+    try:
+        if args.mode == 'clients':
+            report = simulate_clients(server_url, args.clients, args.heartbeats, args.concurrency,
+                                      args.interval, args.key, args.timeout)
+        else:
+            report = simulate_database(server_url, args.database, args.config, args.configs,
+                                       args.rounds, args.concurrency, args.key)
+        if server:
+            report['server'] = server.stats()
+    finally:
+        if server:
+            server.stop()
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
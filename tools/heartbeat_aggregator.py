@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.service import db
+from odoo.sql_db import db_connect
+from odoo.tools import config
+
+from . import circuit_breaker, http_pool, metrics
+
+_logger = logging.getLogger(__name__)
+
+CLIENT_CONFIG_MODEL = 'smarthive.client.config'
+STATUS_MODEL = 'smarthive.client.status'
+
+# Databases prepared and applied together, bounding the registries one run loads at once
+DATABASE_CHUNK_SIZE = 20
+
+# SmartHive servers contacted in parallel
+SERVER_CONCURRENCY = 8
+
+# Whether heartbeats are due and when the next one is, mirroring _heartbeat_domain
+HEARTBEAT_SCHEDULE_QUERY = """
+    SELECT bool_or(next_heartbeat_at IS NULL OR next_heartbeat_at <= now() AT TIME ZONE 'UTC'),
+           min(next_heartbeat_at)
+      FROM smarthive_client_config
+     WHERE active IS TRUE
+       AND local_admin_mode IS NOT TRUE
+       AND COALESCE(server_url, '') != ''
+       AND COALESCE(client_id, '') != ''
+       AND COALESCE(api_key, '') != ''
+"""
+
+
+def aggregator_db():
+    """Get the database aggregating the heartbeats of the server, if configured"""
+    return config.get('smarthive_aggregator_db') or None
+
+
+def _addon_installed(cr):
+    cr.execute("SELECT 1 FROM ir_module_module WHERE name = 'smarthive_client' AND state = 'installed'")
+    return bool(cr.fetchone())
+
+
+def is_available(dbname):
+    """Check whether database ``dbname`` exists and has the addon installed"""
+    try:
+        with db_connect(dbname).cursor() as cr:
+            return _addon_installed(cr)
+    except Exception as e:
+        _logger.debug(f"Heartbeat aggregator database {dbname} is not reachable: {str(e)}")
+        return False
+
+
+def trigger(dbname):
+    """Wake the heartbeat cron of database ``dbname`` up without loading its registry
+
+    Returns whether the cron was found and triggered.
+    """
+    with db_connect(dbname).cursor() as cr:
+        cr.execute("""
+            INSERT INTO ir_cron_trigger (cron_id, call_at, create_uid, write_uid, create_date, write_date)
+            SELECT res_id, now() AT TIME ZONE 'UTC', %s, %s, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+              FROM ir_model_data
+             WHERE module = 'smarthive_client' AND name = 'cron_smarthive_client_heartbeat'
+        """, [SUPERUSER_ID, SUPERUSER_ID])
+        triggered = bool(cr.rowcount)
+    if triggered:
+        # Same wake-up call as ir.cron, so the cron runner does not wait for its next poll
+        with db_connect('postgres').cursor() as cr:
+            cr.execute("SELECT pg_notify('cron_trigger', %s)", [dbname])
+    return triggered
+
+
+def scan_databases():
+    """Get the heartbeat schedule of every database of this server with the addon installed
+
+    Returns ``{dbname: (due, next_heartbeat_at)}``, read on plain connections
+    so no registry is loaded for databases with nothing due.
+    """
+    databases = {}
+    for dbname in db.list_dbs(True):
+        try:
+            with db_connect(dbname).cursor() as cr:
+                if not _addon_installed(cr):
+                    continue
+                cr.execute(HEARTBEAT_SCHEDULE_QUERY)
+                databases[dbname] = cr.fetchone()
+        except Exception as e:
+            _logger.debug(f"Skipping database {dbname} for heartbeat aggregation: {str(e)}")
+    return databases
+
+
+def _post(base_url, endpoint, headers, body, entries, transitions):
+    """POST ``body`` to a server through its circuit breaker
+
+    Returns the response, or None with the error answer and the error type
+    counted by _record_server_request when the request was not sent or
+    failed. Breaker state changes are added to ``transitions``.
+    """
+    try:
+        transitions.append(circuit_breaker.before_request(base_url))
+    except circuit_breaker.CircuitOpenError as e:
+        return None, {'success': False, 'error': str(e), 'circuit_open': True}, 'circuit_open'
+    started = time.monotonic()
+    try:
+        response = http_pool.send(
+            base_url, 'POST', f'{base_url}/smarthive/api/{endpoint}',
+            headers=headers,
+            data=json.dumps(body),
+            connect_timeout=max(entry['connect_timeout'] for entry in entries),
+            read_timeout=max(entry['read_timeout'] for entry in entries),
+            retries=min(entry['max_retries'] for entry in entries),
+        )
+    except requests.exceptions.ConnectionError as e:
+        transitions.append(circuit_breaker.record_failure(base_url))
+        return None, {'success': False, 'error': f"Heartbeat to {base_url} failed: {str(e)}"}, 'connection'
+    except requests.exceptions.Timeout as e:
+        transitions.append(circuit_breaker.record_failure(base_url))
+        return None, {'success': False, 'error': f"Heartbeat to {base_url} failed: {str(e)}"}, 'timeout'
+    except requests.exceptions.RequestException as e:
+        return None, {'success': False, 'error': f"Heartbeat to {base_url} failed: {str(e)}"}, 'request'
+    if response.status_code >= 500:
+        transitions.append(circuit_breaker.record_failure(base_url))
+        return None, {'success': False, 'error': f"HTTP error {response.status_code} from {base_url}"}, 'http'
+    transitions.append(circuit_breaker.record_success(base_url, time.monotonic() - started))
+    return response, None, None
+
+
+def _set_request(entries, endpoint, error_type, started):
+    """Note on ``entries`` how their heartbeat was sent, for the server request metrics"""
+    duration = time.monotonic() - started
+    for entry in entries:
+        entry.update(endpoint=endpoint, error_type=error_type, duration=duration)
+
+
+def _send_single(base_url, entry, transitions):
+    """Send the heartbeat of one entry, for servers without the batch endpoint"""
+    headers = {
+        'Content-Type': 'application/json',
+        'X-SmartHive-API-Key': entry['api_key'],
+        'X-SmartHive-Client-ID': entry['client_id'],
+    }
+    started = time.monotonic()
+    response, error, error_type = _post(base_url, 'client/heartbeat', headers, entry['payload'], [entry],
+                                        transitions)
+    if not error and response.status_code >= 400:
+        error = {'success': False, 'error': f"HTTP error {response.status_code} from {base_url}"}
+        error_type = 'http'
+    if not error:
+        try:
+            result = response.json()
+        except ValueError:
+            error = {'success': False, 'error': 'Invalid JSON response from server'}
+            error_type = 'invalid_response'
+    _set_request([entry], 'client/heartbeat', error_type, started)
+    return error or result
+
+
+def send_batch(base_url, entries):
+    """Send the heartbeats of ``entries`` to one server
+
+    Uses a single batch request, or one request per entry when the server
+    has no batch endpoint. Runs without any database cursor and returns one
+    answer per entry with the circuit breaker state changes to log. The
+    endpoint, error type and duration of each entry's request are set on it.
+    """
+    transitions = []
+    body = {
+        'heartbeats': [
+            dict(entry['payload'], client_id=entry['client_id'], api_key=entry['api_key'])
+            for entry in entries
+        ],
+    }
+    started = time.monotonic()
+    response, error, error_type = _post(base_url, 'client/heartbeat/batch', {'Content-Type': 'application/json'},
+                                        body, entries, transitions)
+    if response is not None and response.status_code == 404:
+        return [_send_single(base_url, entry, transitions) for entry in entries], transitions
+    if not error:
+        try:
+            result = response.json()
+        except ValueError:
+            result = {'error': 'Invalid JSON response from server'}
+        results = result.get('results') or []
+        if not result.get('success') or len(results) != len(entries):
+            error = {'success': False, 'error': result.get('error') or 'Invalid batch heartbeat response'}
+            error_type = 'invalid_response'
+    _set_request(entries, 'client/heartbeat/batch', error_type, started)
+    if error:
+        return [dict(error) for _entry in entries], transitions
+    return results, transitions
+
+
+def _send_batches(batches):
+    """Send the batches of every server in parallel, returning their answers and breaker changes"""
+    answers = {}
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=SERVER_CONCURRENCY, thread_name_prefix='smarthive_aggregator') as executor:
+        futures = {
+            base_url: executor.submit(send_batch, base_url, [entry for _dbname, entry in items])
+            for base_url, items in batches.items()
+        }
+        for base_url, future in futures.items():
+            try:
+                answers[base_url] = future.result()
+            except Exception as e:
+                error = {'success': False, 'error': f"Heartbeat batch to {base_url} failed: {str(e)}"}
+                answers[base_url] = ([dict(error) for _item in batches[base_url]], [])
+                _set_request([entry for _dbname, entry in batches[base_url]], 'client/heartbeat/batch',
+                             'unexpected', started)
+    return answers
+
+
+def _run_chunk(env, dbnames, totals, next_heartbeat_at):
+    """Prepare, send and apply the heartbeats of a chunk of databases"""
+    batches = {}
+    for dbname in dbnames:
+        try:
+            with Registry(dbname).check_signaling().cursor() as cr:
+                entries = api.Environment(cr, SUPERUSER_ID, {})[CLIENT_CONFIG_MODEL]._prepare_heartbeat_batch()
+        except Exception as e:
+            _logger.error(f"Cannot prepare heartbeats of database {dbname}: {str(e)}")
+            continue
+        for entry in entries:
+            batches.setdefault(entry['base_url'], []).append((dbname, entry))
+
+    # No cursor is held while waiting for the servers
+    answered = {}
+    for base_url, (results, transitions) in _send_batches(batches).items():
+        for transition in transitions:
+            env[CLIENT_CONFIG_MODEL]._log_breaker_transition(base_url, transition)
+        for (dbname, entry), result in zip(batches[base_url], results):
+            entry['result'] = result
+            answered.setdefault(dbname, []).append(entry)
+    totals['requests'] += len(batches)
+    totals['configs'] += sum(len(items) for items in batches.values())
+
+    for dbname in dbnames:
+        try:
+            registry = Registry(dbname).check_signaling()
+            try:
+                with registry.cursor() as cr:
+                    env_db = api.Environment(cr, SUPERUSER_ID, {})
+                    Config = env_db[CLIENT_CONFIG_MODEL]
+                    if dbname in answered:
+                        succeeded, failed = Config._apply_heartbeat_batch(answered[dbname])
+                        totals['succeeded'] += succeeded
+                        totals['failed'] += failed
+                    next_heartbeat_at[dbname] = Config._get_next_heartbeat_at()
+                    # The heartbeat log entries of other databases are not flushed by this cron
+                    env_db[STATUS_MODEL].flush_log_buffer()
+            except Exception:
+                registry.reset_changes()
+                raise
+            # Let the workers of that database see the new block and warning states
+            registry.signal_changes()
+        except Exception as e:
+            _logger.error(f"Cannot apply heartbeats of database {dbname}: {str(e)}")
+            totals['failed'] += len(answered.get(dbname, []))
+        metrics.flush(dbname)
+
+
+def run(env):
+    """Send the due heartbeats of every database, batched per server
+
+    Only databases with due heartbeats get their registry loaded, a chunk
+    of DATABASE_CHUNK_SIZE databases at a time; each chunk sends one request
+    per server.
+    """
+    databases = scan_databases()
+    next_heartbeat_at = {dbname: next_at for dbname, (_due, next_at) in databases.items()}
+    due = [dbname for dbname, (is_due, _next_at) in databases.items() if is_due]
+    totals = {
+        'databases': len(databases),
+        'requests': 0,
+        'configs': 0,
+        'succeeded': 0,
+        'failed': 0,
+        'timed_out': 0,
+    }
+    for index in range(0, len(due), DATABASE_CHUNK_SIZE):
+        _run_chunk(env, due[index:index + DATABASE_CHUNK_SIZE], totals, next_heartbeat_at)
+    totals['next_heartbeat_at'] = min(filter(None, next_heartbeat_at.values()), default=False)
+    return totals
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+# Connection pool sizing per SmartHive server
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 10
+
+# Jittered exponential backoff bounds (seconds)
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Responses worth retrying for idempotent calls
+RETRY_STATUSES = {502, 503, 504}
+
+_lock = threading.Lock()
+_pid = None
+_sessions = {}
+_stats = {}
+
+
+def _reset_after_fork():
+    """Drop sessions inherited from a parent process"""
+    global _pid
+    if _pid != os.getpid():
+        _sessions.clear()
+        _stats.clear()
+        _pid = os.getpid()
+
+
+def get_session(base_url):
+    """Get the keep-alive session of a server, creating it on first use"""
+    with _lock:
+        _reset_after_fork()
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[base_url] = session
+            _stats[base_url] = {
+                'requests': 0,
+                'retries': 0,
+                'errors': 0,
+                'total_time': 0.0,
+            }
+        return session
+
+
+def _record(base_url, key, value=1):
+    with _lock:
+        stats = _stats.get(base_url)
+        if stats is not None:
+            stats[key] += value
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff delay before retry ``attempt``"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def send(base_url, method, url, headers=None, data=None, connect_timeout=5, read_timeout=30, retries=0):
+    """Send a request through the pooled session of ``base_url``
+
+    Connection errors, timeouts and gateway errors are retried up to
+    ``retries`` times; callers pass ``retries=0`` for non-idempotent calls.
+    """
+    session = get_session(base_url)
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            response = session.request(
+                method, url, headers=headers, data=data,
+                timeout=(connect_timeout, read_timeout),
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _record(base_url, 'errors')
+            if attempt >= retries:
+                raise
+        else:
+            _record(base_url, 'requests')
+            _record(base_url, 'total_time', time.monotonic() - started)
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+        attempt += 1
+        _record(base_url, 'retries')
+        delay = backoff_delay(attempt)
+        _logger.info("Retrying %s %s in %.2fs (attempt %s/%s)", method, url, delay, attempt, retries)
+        time.sleep(delay)
+
+
+def pool_stats():
+    """Get per-server statistics of the pooled sessions of this worker"""
+    with _lock:
+        _reset_after_fork()
+        result = {}
+        for base_url, stats in _stats.items():
+            session = _sessions[base_url]
+            connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                # The urllib3 container refuses plain iteration, go through keys()
+                for key in pools.keys():
+                    connections += getattr(pools.get(key), 'num_connections', 0)
+            result[base_url] = dict(
+                stats,
+                connections_opened=connections,
+                avg_time=stats['total_time'] / stats['requests'] if stats['requests'] else 0.0,
+            )
+        return result
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from odoo.tools import config
+from odoo.tools import cache
+
+_logger = logging.getLogger(__name__)
+
+# Seconds between writes of a worker's metrics to the shared directory
+FLUSH_INTERVAL = 15
+
+# Upper bounds of the latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Registry-cached lookups whose hit ratio is read from the ormcache statistics
+CACHED_METHODS = {
+    '_get_enforcement_state',
+    '_smarthive_is_exempt',
+    '_smarthive_block_allowlists',
+}
+
+METRICS = {
+    'smarthive_heartbeat_duration_seconds': ('histogram', "Heartbeat round trip time to the SmartHive server"),
+    'smarthive_server_requests_total': ('counter', "Requests sent to the SmartHive server by outcome"),
+    'smarthive_server_errors_total': ('counter', "Failed SmartHive server requests by error type"),
+    'smarthive_route_requests_total': ('counter', "Requests served by /smarthive_client routes"),
+    'smarthive_route_duration_seconds': ('histogram', "Time spent serving /smarthive_client routes"),
+    'smarthive_enforcement_checks_total': ('counter', "Block enforcement checks by check and result"),
+    'smarthive_cache_hits_total': ('counter', "Cache hits of SmartHive lookups"),
+    'smarthive_cache_misses_total': ('counter', "Cache misses of SmartHive lookups"),
+}
+
+# Metrics of exited workers are folded into this file so counters never go back
+RETIRED_FILE = 'retired.json'
+
+_lock = threading.Lock()
+_pid = None
+_worker_id = None
+_metrics = {}
+_last_flush = {}
+
+
+def _process_start(pid):
+    """Get the start time of a process, telling apart processes reusing a pid (Linux only)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # starttime is the 22nd field, the 20th after the parenthesized command name
+            return f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _reset_after_fork():
+    """Drop metrics inherited from a parent process"""
+    global _pid, _worker_id
+    if _pid != os.getpid():
+        _metrics.clear()
+        _last_flush.clear()
+        _pid = os.getpid()
+        _worker_id = f'{_pid}-{_process_start(_pid) or 0}'
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+def _db_metrics(dbname):
+    _reset_after_fork()
+    return _metrics.setdefault(dbname, {'counters': {}, 'histograms': {}})
+
+
+def inc(dbname, name, labels=None, value=1):
+    """Increase counter ``name`` of database ``dbname``"""
+    key = (name, _labels_key(labels))
+    with _lock:
+        counters = _db_metrics(dbname)['counters']
+        counters[key] = counters.get(key, 0) + value
+
+
+def observe(dbname, name, value, labels=None):
+    """Record ``value`` in histogram ``name`` of database ``dbname``"""
+    key = (name, _labels_key(labels))
+    with _lock:
+        histograms = _db_metrics(dbname)['histograms']
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram[index] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+
+def _cache_counters(dbname):
+    """Get the hit and miss counts of the cached SmartHive lookups in this worker"""
+    counters = {}
+    for key, counter in list(getattr(cache, 'STAT', {}).items()):
+        if len(key) != 3 or key[0] != dbname:
+            continue
+        method = getattr(key[2], '__name__', str(key[2]))
+        if method not in CACHED_METHODS:
+            continue
+        labels = _labels_key({'method': method})
+        counters[('smarthive_cache_hits_total', labels)] = getattr(counter, 'hit', 0)
+        counters[('smarthive_cache_misses_total', labels)] = getattr(counter, 'miss', 0)
+    return counters
+
+
+def _serialize(total):
+    return {
+        'counters': [[name, dict(labels), value] for (name, labels), value in total['counters'].items()],
+        'histograms': [[name, dict(labels), value] for (name, labels), value in total['histograms'].items()],
+    }
+
+
+def _snapshot(dbname):
+    with _lock:
+        metrics = _db_metrics(dbname)
+        counters = dict(metrics['counters'])
+        histograms = {key: list(value) for key, value in metrics['histograms'].items()}
+    counters.update(_cache_counters(dbname))
+    return _serialize({'counters': counters, 'histograms': histograms})
+
+
+def _storage_dir(dbname):
+    return os.path.join(config['data_dir'], 'smarthive_metrics', dbname)
+
+
+def _worker_file(directory):
+    return os.path.join(directory, f'{socket.gethostname()}-{_worker_id}.json')
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def flush(dbname, force=False):
+    """Write the metrics of this worker to the shared directory
+
+    Unless ``force`` is set, writes happen at most every FLUSH_INTERVAL seconds.
+    """
+    now = time.monotonic()
+    with _lock:
+        _reset_after_fork()
+        if not force and now - _last_flush.get(dbname, 0.0) < FLUSH_INTERVAL:
+            return
+        _last_flush[dbname] = now
+    try:
+        directory = _storage_dir(dbname)
+        os.makedirs(directory, exist_ok=True)
+        _write_json(_worker_file(directory), _snapshot(dbname))
+    except OSError as e:
+        _logger.warning(f"Cannot write SmartHive metrics: {str(e)}")
+
+
+def _merge(total, snapshot):
+    counters = total.setdefault('counters', {})
+    histograms = total.setdefault('histograms', {})
+    for name, labels, value in snapshot.get('counters', []):
+        key = (name, _labels_key(labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, value in snapshot.get('histograms', []):
+        key = (name, _labels_key(labels))
+        if key in histograms:
+            histograms[key] = [a + b for a, b in zip(histograms[key], value)]
+        else:
+            histograms[key] = list(value)
+    return total
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _worker_alive(worker_id):
+    """Check whether the worker of a metrics file still runs, and not just its pid"""
+    pid, _sep, start = worker_id.partition('-')
+    if not _pid_alive(int(pid)):
+        return False
+    current_start = _process_start(int(pid))
+    return start in ('', '0') or current_start is None or current_start == start
+
+
+def _retire_exited_workers(directory):
+    """Fold the files of exited workers of this host into the retired file"""
+    prefix = f'{socket.gethostname()}-'
+    retired = None
+    for filename in os.listdir(directory):
+        if not (filename.startswith(prefix) and filename.endswith('.json')):
+            continue
+        worker_id = filename[len(prefix):-len('.json')]
+        if not worker_id.partition('-')[0].isdigit() or _worker_alive(worker_id):
+            continue
+        path = os.path.join(directory, filename)
+        if retired is None:
+            retired = _merge({}, _read_json(os.path.join(directory, RETIRED_FILE)) or {})
+        _merge(retired, _read_json(path) or {})
+        os.remove(path)
+    if retired is not None:
+        _write_json(os.path.join(directory, RETIRED_FILE), _serialize(retired))
+
+
+def _read_all(directory):
+    total = {'counters': {}, 'histograms': {}}
+    for filename in os.listdir(directory):
+        if filename.endswith('.json'):
+            _merge(total, _read_json(os.path.join(directory, filename)) or {})
+    return total
+
+
+def collect(dbname):
+    """Aggregate the metrics of every worker of database ``dbname``"""
+    flush(dbname, force=True)
+    directory = _storage_dir(dbname)
+    try:
+        if fcntl is None:
+            return _read_all(directory)
+        # Readers and the folding of exited workers must not interleave
+        with open(os.path.join(directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            _retire_exited_workers(directory)
+            return _read_all(directory)
+    except OSError as e:
+        _logger.warning(f"Cannot read SmartHive metrics: {str(e)}")
+        return {'counters': {}, 'histograms': {}}
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    escaped = (
+        '%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in items
+    )
+    return '{%s}' % ','.join(escaped)
+
+
+def render_prometheus(total):
+    """Render aggregated metrics in the Prometheus text exposition format"""
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if metric_type == 'counter':
+            for (metric, labels), value in sorted(total['counters'].items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+            continue
+        for (metric, labels), value in sorted(total['histograms'].items()):
+            if metric != name:
+                continue
+            # Buckets are stored cumulatively, +Inf is the total count
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
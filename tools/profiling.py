@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import json
+import logging
+import random
+import threading
+import time
+
+from odoo.http import request
+from odoo.models import BaseModel
+from odoo.tools.profiler import Profiler
+
+_logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _get_env(target):
+    if isinstance(target, BaseModel):
+        return target.env
+    return request.env if request else None
+
+
+def profiled(name):
+    """Measure wall time and SQL queries of a SmartHive hook when profiling is on
+
+    Calls slower than the configured threshold are logged as ``system`` error
+    status entries with a profile summary; a sampled share of the calls runs
+    under Odoo's profiler, whose result is saved as an ``ir.profile`` record.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            env = _get_env(self)
+            # Nested hooks are measured as part of the outermost one
+            if env is None or getattr(_local, 'active', False):
+                return func(self, *args, **kwargs)
+            enabled, threshold_ms, sample_rate = env['smarthive.client.config']._get_profiling_settings()
+            if not enabled:
+                return func(self, *args, **kwargs)
+
+            cr = env.cr
+            thread = threading.current_thread()
+            queries = cr.sql_log_count
+            query_time = getattr(thread, 'query_time', 0.0)
+            sampled = sample_rate and random.uniform(0, 100) < sample_rate
+            profiler = None
+            started = time.perf_counter()
+            _local.active = True
+            try:
+                if sampled:
+                    profiler = Profiler(db=cr.dbname, description=f'SmartHive {name}')
+                    with profiler:
+                        return func(self, *args, **kwargs)
+                return func(self, *args, **kwargs)
+            finally:
+                _local.active = False
+                duration_ms = (time.perf_counter() - started) * 1000
+                if duration_ms >= threshold_ms:
+                    _log_slow_call(env, name, {
+                        'duration_ms': round(duration_ms, 2),
+                        'sql_queries': cr.sql_log_count - queries,
+                        'sql_ms': round((getattr(thread, 'query_time', 0.0) - query_time) * 1000, 2),
+                        'threshold_ms': threshold_ms,
+                        'profile_id': getattr(profiler, 'profile_id', None),
+                    })
+        return wrapper
+    return decorator
+
+
+def _log_slow_call(env, name, summary):
+    summary['python_ms'] = round(summary['duration_ms'] - summary['sql_ms'], 2)
+    message = f"Slow SmartHive call {name}: {summary['duration_ms']}ms, {summary['sql_queries']} queries"
+    _logger.warning(message)
+    try:
+        env['smarthive.client.status'].sudo().log_status(
+            'system', 'error', message, details=json.dumps(dict(summary, call=name)))
+    except Exception as e:
+        _logger.error(f"Cannot log slow SmartHive call: {str(e)}")
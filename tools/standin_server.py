@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stand-in SmartHive server for testing the client offline
+
+Implements the client/heartbeat, client/heartbeat/batch and client/status
+endpoints with configurable latency, error rates and scripted block and
+warning states.
+Only the standard library is used, run it directly:
+
+    python3 tools/standin_server.py --port 8899 --latency 0.05 --error-rate 0.01 --script states.json
+
+A script maps client ids ("*" for any client) to the states returned from
+a given heartbeat count onwards:
+
+    {"*": [{"after": 0}, {"after": 10, "show_warning": true, "warning_message": "Invoice due"}],
+     "client-7": [{"after": 3, "blocked": true, "block_reason": "Payment overdue"}]}
+
+Served request statistics are available at GET /standin/stats.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_logger = logging.getLogger(__name__)
+
+API_PREFIX = '/smarthive/api/'
+
+HEARTBEAT_DELTA_CAPABILITY = 'heartbeat_delta_v1'
+
+DEFAULT_STATE = {
+    'blocked': False,
+    'block_reason': '',
+    'show_warning': False,
+    'warning_message': '',
+    'payment_status': 'paid',
+}
+
+
+def percentile(values, pct):
+    """Get the ``pct`` percentile of ``values`` by nearest rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100.0 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def state_fingerprint(state):
+    """Fingerprint of a client state, sent back by delta-capable clients"""
+    canonical = json.dumps({key: state.get(key) for key in DEFAULT_STATE}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class StandinServer:
+    """SmartHive server stand-in with injectable latency and failures"""
+
+    def __init__(self, host='127.0.0.1', port=8899, latency=0.0, jitter=0.0, error_rate=0.0,
+                 hang_rate=0.0, hang_time=60.0, api_key=None, script=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_time = hang_time
+        self.api_key = api_key
+        self.script = script or {}
+        self._lock = threading.Lock()
+        self._heartbeats = {}
+        self._stats = {}
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.standin = self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='smarthive_standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self):
+        """Forget heartbeat counts and statistics"""
+        with self._lock:
+            self._heartbeats.clear()
+            self._stats.clear()
+
+    def client_state(self, client_id, count):
+        """Get the scripted state of a client at its ``count``-th heartbeat"""
+        state = dict(DEFAULT_STATE)
+        for step in self.script.get('*', []) + self.script.get(client_id, []):
+            if count >= step.get('after', 0):
+                state.update({key: value for key, value in step.items() if key != 'after'})
+        return state
+
+    def handle(self, endpoint, headers, body):
+        """Answer one API call, returning the HTTP status and JSON payload"""
+        if random.random() < self.hang_rate:
+            time.sleep(self.hang_time)
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        if random.random() < self.error_rate:
+            return 503, {'success': False, 'error': 'Injected server error'}
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'success': False, 'error': 'Invalid JSON body'}
+        if endpoint == 'client/heartbeat/batch':
+            # Aggregated heartbeats of several clients carry their own credentials
+            return 200, {
+                'success': True,
+                'results': [
+                    self.heartbeat(heartbeat.get('client_id') or '', heartbeat)
+                    if not self.api_key or heartbeat.get('api_key') == self.api_key
+                    else {'success': False, 'error': 'Invalid API credentials'}
+                    for heartbeat in data.get('heartbeats') or []
+                ],
+            }
+
+        client_id = headers.get('X-SmartHive-Client-ID') or ''
+        if self.api_key and headers.get('X-SmartHive-API-Key') != self.api_key:
+            return 401, {'success': False, 'error': 'Invalid API credentials'}
+        if endpoint == 'client/heartbeat':
+            return 200, self.heartbeat(client_id, data)
+        if endpoint == 'client/status':
+            return 200, {'success': True}
+        return 404, {'success': False, 'error': f'Unknown endpoint {endpoint}'}
+
+    def heartbeat(self, client_id, data):
+        """Answer the heartbeat of one client with its scripted state"""
+        with self._lock:
+            count = self._heartbeats.get(client_id, 0)
+            self._heartbeats[client_id] = count + 1
+        state = self.client_state(client_id, count)
+        fingerprint = state_fingerprint(state)
+        result = {
+            'success': True,
+            'capabilities': [HEARTBEAT_DELTA_CAPABILITY],
+            'state_fingerprint': fingerprint,
+        }
+        if HEARTBEAT_DELTA_CAPABILITY in (data.get('capabilities') or []) \
+                and data.get('state_fingerprint') == fingerprint:
+            result['unchanged'] = True
+        else:
+            result.update(state)
+        return result
+
+    def record(self, endpoint, status, duration):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {'requests': 0, 'errors': 0, 'latencies': []})
+            stats['requests'] += 1
+            if status >= 400:
+                stats['errors'] += 1
+            stats['latencies'].append(duration)
+
+    def stats(self):
+        """Get per-endpoint request counts, error counts and latency percentiles"""
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'p50': percentile(stats['latencies'], 50),
+                    'p95': percentile(stats['latencies'], 95),
+                    'p99': percentile(stats['latencies'], 99),
+                    'max': max(stats['latencies'], default=0.0),
+                }
+                for endpoint, stats in self._stats.items()
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep connections alive so the client's pooled sessions are exercised
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        standin = self.server.standin
+        started = time.monotonic()
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.startswith(API_PREFIX):
+            endpoint = self.path[len(API_PREFIX):].strip('/')
+            status, payload = standin.handle(endpoint, self.headers, body)
+        else:
+            endpoint = self.path
+            status, payload = 404, {'success': False, 'error': 'Not found'}
+        self._send(status, payload)
+        standin.record(endpoint, status, time.monotonic() - started)
+
+    def do_GET(self):
+        standin = self.server.standin
+        if self.path == '/standin/stats':
+            self._send(200, standin.stats())
+        elif self.path == '/standin/reset':
+            standin.reset()
+            self._send(200, {'success': True})
+        else:
+            self._send(404, {'success': False, 'error': 'Not found'})
+
+    def _send(self, status, payload):
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        _logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def add_server_arguments(parser):
+    """Add the stand-in server options to an argument parser"""
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random extra latency, up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="Share of requests held for --hang-time")
+    parser.add_argument('--hang-time', type=float, default=60.0)
+    parser.add_argument('--api-key', help="Reject requests with another API key")
+    parser.add_argument('--script', help="JSON file of scripted block and warning states")
+
+
+def server_from_arguments(args, port=None):
+    """Build a stand-in server from parsed ``add_server_arguments`` options"""
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    return StandinServer(
+        host=args.host,
+        port=args.port if port is None else port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_time=args.hang_time,
+        api_key=args.api_key,
+        script=script,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in SmartHive server")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = server_from_arguments(args)
+    _logger.info("SmartHive stand-in server listening on %s", server.url)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()